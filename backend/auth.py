@@ -1,19 +1,39 @@
 import os
 import logging
 import secrets
-from functools import lru_cache
+import threading
+import time
+from hashlib import sha256
 
+import jwt
 import requests
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
+
+from .cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
+AUTH0_ISSUER = f"https://{AUTH0_DOMAIN}/" if AUTH0_DOMAIN else None
+AUTH0_JWKS_URL = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json" if AUTH0_DOMAIN else None
+AUTH0_USERINFO_URL = f"https://{AUTH0_DOMAIN}/userinfo" if AUTH0_DOMAIN else None
 AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
 ALGORITHMS = ["RS256"]
 AUTH0_JWKS_TIMEOUT_SECONDS = float(os.getenv("AUTH0_JWKS_TIMEOUT_SECONDS", "5"))
+# The JWKS is refetched once it is older than the TTL. If Auth0 cannot be reached,
+# the previous keys keep being accepted until the stale TTL, then verification fails.
+AUTH0_JWKS_CACHE_TTL_SECONDS = float(os.getenv("AUTH0_JWKS_CACHE_TTL_SECONDS", "300"))
+AUTH0_JWKS_STALE_TTL_SECONDS = float(os.getenv("AUTH0_JWKS_STALE_TTL_SECONDS", "900"))
+# Unknown kids force a refresh, at most once per interval, so tokens with bogus kids
+# cannot turn into a stream of requests to Auth0.
+AUTH0_JWKS_MIN_REFRESH_SECONDS = float(os.getenv("AUTH0_JWKS_MIN_REFRESH_SECONDS", "30"))
+# Tolerated clock skew between this host and Auth0 for exp/nbf/iat checks.
+AUTH0_JWT_LEEWAY_SECONDS = float(os.getenv("AUTH0_JWT_LEEWAY_SECONDS", "30"))
+# Verified claims are reused for a few seconds so bursts of requests with the same
+# bearer token skip the RS256 signature check. Set to 0 to disable.
+AUTH0_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH0_TOKEN_CACHE_TTL_SECONDS", "5"))
 
 if not AUTH0_DOMAIN or not AUTH0_AUDIENCE:
     # Backend can still start but will reject requests until properly configured
@@ -22,6 +42,9 @@ if not AUTH0_DOMAIN or not AUTH0_AUDIENCE:
 http_bearer = HTTPBearer()
 LOG_JWT_PAYLOADS = os.getenv("LOG_JWT_PAYLOADS", "").lower() in {"1", "true", "yes"}
 
+# Keyed by SHA-256 of the raw token so bearer tokens are never held in memory.
+_verified_tokens = TTLCache(maxsize=10_000, ttl=AUTH0_TOKEN_CACHE_TTL_SECONDS)
+
 
 def _dev_auth_payload(token: str) -> dict | None:
     enabled = os.getenv("ENABLE_DEV_AUTH", "").lower() in {"1", "true", "yes"}
@@ -49,28 +72,107 @@ def _dev_auth_payload(token: str) -> dict | None:
     }
 
 
-@lru_cache()
-def _get_jwks():
-    jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url, timeout=AUTH0_JWKS_TIMEOUT_SECONDS)
+class JWKSUnavailable(Exception):
+    """No usable signing keys: Auth0 cannot be reached and any cached JWKS is too stale."""
+
+
+_jwks_lock = threading.Lock()
+# (JWKS document, time.monotonic() of the successful fetch)
+_jwks_cache: tuple[dict | None, float] = (None, 0.0)
+# time.monotonic() of the last failed fetch, so an outage costs one attempt per interval
+_jwks_failed_at: float | None = None
+
+
+def _fetch_jwks() -> dict:
+    response = requests.get(AUTH0_JWKS_URL, timeout=AUTH0_JWKS_TIMEOUT_SECONDS)
     response.raise_for_status()
     return response.json()
 
 
-def _find_rsa_key(jwks: dict, kid: str) -> dict | None:
+def _clear_jwks_cache() -> None:
+    global _jwks_cache, _jwks_failed_at, _parsed_jwks
+    _jwks_cache = (None, 0.0)
+    _jwks_failed_at = None
+    _parsed_jwks = (None, {})
+
+
+def _get_jwks(force_refresh: bool = False) -> dict:
+    global _jwks_cache, _jwks_failed_at
+    jwks, fetched_at = _jwks_cache
+    if (
+        jwks is not None
+        and not force_refresh
+        and time.monotonic() - fetched_at < AUTH0_JWKS_CACHE_TTL_SECONDS
+    ):
+        return jwks
+
+    # Single flight: callers that queued on the lock reuse the fetch made by whoever
+    # held it, instead of each going to Auth0 in turn.
+    with _jwks_lock:
+        jwks, current_fetched_at = _jwks_cache
+        if jwks is not None and current_fetched_at != fetched_at:
+            return jwks
+        age = time.monotonic() - current_fetched_at
+        if jwks is not None and not force_refresh and age < AUTH0_JWKS_CACHE_TTL_SECONDS:
+            return jwks
+        if jwks is not None and force_refresh and age < AUTH0_JWKS_MIN_REFRESH_SECONDS:
+            return jwks
+        usable_stale = jwks is not None and age < AUTH0_JWKS_STALE_TTL_SECONDS
+        # Callers queued behind a failed fetch fall back at once instead of retrying in turn
+        if (
+            _jwks_failed_at is not None
+            and time.monotonic() - _jwks_failed_at < AUTH0_JWKS_MIN_REFRESH_SECONDS
+        ):
+            if usable_stale:
+                return jwks
+            raise JWKSUnavailable("JWKS unavailable; the last fetch failed recently")
+        try:
+            fresh_jwks = _fetch_jwks()
+        except Exception as exc:
+            _jwks_failed_at = time.monotonic()
+            if usable_stale:
+                logger.warning("JWKS refresh failed; using keys fetched %.0fs ago", age)
+                return jwks
+            raise JWKSUnavailable("JWKS fetch failed") from exc
+        # Index keys by kid before publishing the document, so concurrent requests
+        # never parse the same JWKS themselves.
+        _index_jwks(fresh_jwks)
+        _jwks_cache = (fresh_jwks, time.monotonic())
+        _jwks_failed_at = None
+        return fresh_jwks
+
+
+# Parsed public keys for the most recently fetched JWKS document, by ``kid``.
+_parsed_jwks: tuple[dict | None, dict[str, RSAPublicKey]] = (None, {})
+
+
+def _load_rsa_keys(jwks: dict) -> dict[str, RSAPublicKey]:
+    rsa_keys = {}
     for key in jwks.get("keys", []):
-        if key.get("kid") == kid:
-            # python-jose does not provide a public ``algorithms`` module like
-            # PyJWT. We therefore return the JWK values directly so ``jwt.decode``
-            # can validate the signature.
-            return {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key.get("use"),
-                "n": key["n"],
-                "e": key["e"],
-            }
-    return None
+        kid = key.get("kid")
+        if not kid:
+            continue
+        try:
+            # PyJWT verifies against a ``cryptography`` key object; converting once
+            # per JWKS fetch avoids re-deriving the key from base64 on every request.
+            rsa_keys[kid] = jwt.PyJWK(key, algorithm=ALGORITHMS[0]).key
+        except (jwt.PyJWTError, ValueError):
+            logger.warning("Ignoring unusable JWKS key %s", kid)
+    return rsa_keys
+
+
+def _index_jwks(jwks: dict) -> dict[str, RSAPublicKey]:
+    global _parsed_jwks
+    rsa_keys = _load_rsa_keys(jwks)
+    _parsed_jwks = (jwks, rsa_keys)
+    return rsa_keys
+
+
+def _find_rsa_key(jwks: dict, kid: str) -> RSAPublicKey | None:
+    source, rsa_keys = _parsed_jwks
+    if source is not jwks:
+        rsa_keys = _index_jwks(jwks)
+    return rsa_keys.get(kid)
 
 
 def _get_rsa_key(token: str):
@@ -84,21 +186,32 @@ def _get_rsa_key(token: str):
         return rsa_key
 
     # Auth0 may rotate signing keys while this process still has a cached JWKS.
-    cache_clear = getattr(_get_jwks, "cache_clear", None)
-    if cache_clear:
-        cache_clear()
-    rsa_key = _find_rsa_key(_get_jwks(), kid)
+    rsa_key = _find_rsa_key(_get_jwks(force_refresh=True), kid)
     if rsa_key:
         return rsa_key
 
     raise HTTPException(status_code=401, detail="Invalid authorization header")
 
 
+def _cache_verified_payload(cache_key: bytes, payload: dict) -> None:
+    ttl = AUTH0_TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    # Held as a private copy so handlers mutating their claims cannot alter the cache
+    _verified_tokens.set(cache_key, dict(payload), ttl=ttl)
+
+
 def verify_jwt_token(token: str) -> dict:
     dev_payload = _dev_auth_payload(token)
     if dev_payload:
         return dev_payload
 
+    cache_key = sha256(token.encode("utf-8")).digest()
+    cached_payload = _verified_tokens.get(cache_key)
+    if cached_payload is not None:
+        return dict(cached_payload)
+
     try:
         rsa_key = _get_rsa_key(token)
         payload = jwt.decode(
@@ -106,17 +219,27 @@ def verify_jwt_token(token: str) -> dict:
             rsa_key,
             algorithms=ALGORITHMS,
             audience=AUTH0_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/",
+            issuer=AUTH0_ISSUER,
+            leeway=AUTH0_JWT_LEEWAY_SECONDS,
+            options={"require": ["exp", "iat", "iss", "aud"]},
         )
         if LOG_JWT_PAYLOADS:
             logger.info("JWT payload: %s", payload)
         else:
             logger.debug("JWT validated for user %s", payload.get("sub"))
+    except JWKSUnavailable:
+        # An outage is not a bad token; 503 lets clients retry instead of dropping the session
+        logger.error("Rejecting request: Auth0 signing keys are unavailable")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service unavailable",
+        )
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    _cache_verified_payload(cache_key, payload)
     return payload
 
 
@@ -8,11 +8,31 @@ if DATABASE_URL.startswith("postgres://"):
 
 enable_sqlite_check_same_thread = DATABASE_URL.startswith("sqlite")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=({"check_same_thread": False} if enable_sqlite_check_same_thread else {}),
+# SQLite connections are local file handles, so only network databases get a sized pool
+# with liveness checks and periodic recycling. The pool is per process: size it so that
+# (pool_size + max_overflow) * workers stays under the server's connection limit.
+engine_options = (
+    {"connect_args": {"check_same_thread": False}}
+    if enable_sqlite_check_same_thread
+    else {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    }
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(DATABASE_URL, **engine_options)
+
+# Most connections that can be checked out at once, or None for SQLite's default pool.
+pool_capacity = (
+    None
+    if enable_sqlite_check_same_thread
+    else engine_options["pool_size"] + engine_options["max_overflow"]
+)
+
+# Objects stay loaded after commit; refresh explicitly when server-side values are needed.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
@@ -7,30 +7,49 @@ from fastapi import (
     Request,
     Query,
 )
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, TypeAdapter, WithJsonSchema
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime, timezone
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exception_handlers import http_exception_handler
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, text
+from sqlalchemy import (
+    bindparam,
+    delete,
+    exists,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
-from .auth import verify_jwt, AUTH0_DOMAIN
+from .auth import verify_jwt, AUTH0_USERINFO_URL
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 from openai import OpenAI
-from uuid import uuid4
 from hashlib import sha256
 import logging
-import requests
+import anyio
+import httpx
 import math
 from io import BytesIO
 from PIL import Image, UnidentifiedImageError
 
-from .database import Base, engine, SessionLocal
+from .database import Base, engine, SessionLocal, pool_capacity
 from . import models
+from .cache import TTLCache
+from .middleware import LimitUploadSizeMiddleware
+from .responses import ORJSONResponse
 from .mcp_server import habit_mcp, protected_resource_metadata
 from .storage import ObjectStorage
 
@@ -43,51 +62,136 @@ logging.getLogger("uvicorn").setLevel(_log_level)
 logging.getLogger("uvicorn.error").setLevel(_log_level)
 logging.getLogger("uvicorn.access").setLevel(_log_level)
 
-models.Base.metadata.create_all(bind=engine)
+# Manual migrations for databases created before columns were added to the models.
+_MIGRATED_USER_SETTINGS_COLUMNS = ("nickname", "email")
+# Single-column user_id indexes superseded by the composite (user_id, ...) indexes.
+_OBSOLETE_INDEXES = {
+    "habits": "ix_habits_user_id",
+    "checks": "ix_checks_user_id",
+    "counts": "ix_counts_user_id",
+    "weight_updates": "ix_weight_updates_user_id",
+    "active_days": "ix_active_days_user_id",
+}
+_database_ready = False
+
+
+def _missing_user_settings_columns(connection) -> list[str]:
+    inspector = inspect(connection)
+    if not inspector.has_table("user_settings"):
+        return []
+    columns = {column["name"] for column in inspector.get_columns("user_settings")}
+    return [column for column in _MIGRATED_USER_SETTINGS_COLUMNS if column not in columns]
+
+
+def _missing_indexes(connection) -> list:
+    # create_all only builds indexes together with new tables, so indexes added to
+    # existing tables later are created here.
+    inspector = inspect(connection)
+    missing = []
+    for table in models.Base.metadata.sorted_tables:
+        if not table.indexes or not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def _obsolete_indexes(connection) -> list[str]:
+    inspector = inspect(connection)
+    return [
+        name
+        for table, name in _OBSOLETE_INDEXES.items()
+        if inspector.has_table(table)
+        and any(index["name"] == name for index in inspector.get_indexes(table))
+    ]
 
-# Manual migration to add new columns if they don't exist
-try:
-    with engine.begin() as connection:
-        inspector = inspect(connection)
-        columns = (
-            [column["name"] for column in inspector.get_columns("user_settings")]
-            if inspector.has_table("user_settings")
-            else []
-        )
 
-        if "nickname" not in columns:
-            logger.info("Adding nickname column to user_settings table")
-            connection.execute(text("ALTER TABLE user_settings ADD COLUMN nickname TEXT"))
-
-        if "email" not in columns:
-            logger.info("Adding email column to user_settings table")
-            connection.execute(text("ALTER TABLE user_settings ADD COLUMN email TEXT"))
-
-        # Ensure sub-habit checks retain their parent habit relationship
-        pending_backfill = connection.execute(
-            text("SELECT COUNT(1) FROM checks WHERE habit_id IS NULL AND sub_habit_id IS NOT NULL")
-        ).scalar()
-        if pending_backfill:
-            logger.info("Backfilling habit_id for %s sub-habit checks", pending_backfill)
-            connection.execute(
-                text(
-                    """
-                    UPDATE checks
-                    SET habit_id = (
-                        SELECT parent_habit_id
-                        FROM sub_habits
-                        WHERE sub_habits.id = checks.sub_habit_id
-                    )
-                    WHERE habit_id IS NULL
-                      AND sub_habit_id IS NOT NULL
-                    """
-                )
+def _has_pending_check_backfill(connection) -> bool:
+    # Ensure sub-habit checks retain their parent habit relationship
+    return (
+        connection.exec_driver_sql(
+            "SELECT 1 FROM checks WHERE habit_id IS NULL AND sub_habit_id IS NOT NULL LIMIT 1"
+        ).first()
+        is not None
+    )
+
+
+def _apply_migrations(connection) -> None:
+    for column in _missing_user_settings_columns(connection):
+        logger.info("Adding %s column to user_settings table", column)
+        connection.exec_driver_sql(f"ALTER TABLE user_settings ADD COLUMN {column} TEXT")
+
+    if _has_pending_check_backfill(connection):
+        result = connection.exec_driver_sql(
+            """
+            UPDATE checks
+            SET habit_id = (
+                SELECT parent_habit_id
+                FROM sub_habits
+                WHERE sub_habits.id = checks.sub_habit_id
             )
-except Exception:
-    logger.exception("Startup database migration failed")
-    if os.getenv("ALLOW_STARTUP_MIGRATION_FAILURE", "").lower() not in {"1", "true", "yes"}:
+            WHERE habit_id IS NULL
+              AND sub_habit_id IS NOT NULL
+            """
+        )
+        logger.info("Backfilled habit_id for %s sub-habit checks", result.rowcount)
+
+    for index in _missing_indexes(connection):
+        logger.info("Creating index %s", index.name)
+        index.create(connection, checkfirst=True)
+
+    for name in _obsolete_indexes(connection):
+        logger.info("Dropping index %s", name)
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+@contextmanager
+def _migration_transaction(connection):
+    """Run the block in a transaction that holds the database write lock."""
+    if connection.dialect.name != "sqlite":
+        with connection.begin():
+            yield
+        return
+
+    # pysqlite only issues BEGIN before the first DML statement. Take the write lock up
+    # front so concurrently booting workers queue here and then find nothing to migrate.
+    connection.execution_options(isolation_level="AUTOCOMMIT")
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.exec_driver_sql("ROLLBACK")
         raise
-    logger.warning("Continuing after startup migration failure by configuration")
+    connection.exec_driver_sql("COMMIT")
+
+
+def _prepare_database() -> None:
+    """Create missing tables and apply manual migrations, once per process."""
+    global _database_ready
+    if _database_ready:
+        return
+
+    with engine.connect() as connection:
+        models.Base.metadata.create_all(bind=connection)
+        connection.commit()
+        try:
+            # Fast path: an up-to-date schema is only inspected, never write-locked.
+            pending = bool(_missing_user_settings_columns(connection))
+            pending = pending or _has_pending_check_backfill(connection)
+            pending = pending or bool(_missing_indexes(connection))
+            pending = pending or bool(_obsolete_indexes(connection))
+            connection.rollback()
+            if pending:
+                with _migration_transaction(connection):
+                    _apply_migrations(connection)
+        except Exception:
+            logger.exception("Startup database migration failed")
+            allow_failure = os.getenv("ALLOW_STARTUP_MIGRATION_FAILURE", "").lower()
+            if allow_failure not in {"1", "true", "yes"}:
+                raise
+            logger.warning("Continuing after startup migration failure by configuration")
+    _database_ready = True
+
 
 # Initialize optional services with error handling
 try:
@@ -104,10 +208,36 @@ except Exception as e:
 
 mcp_http_app = habit_mcp.streamable_http_app()
 
+AUTH0_USERINFO_TIMEOUT_SECONDS = 10.0
+# Auth0 profiles rarely change; reuse userinfo per access token for a few minutes.
+_userinfo_cache = TTLCache(maxsize=5000, ttl=300)
+
+
+def _userinfo_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=AUTH0_USERINFO_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_keepalive_connections=50),
+    )
+
+
+def _size_threadpool() -> None:
+    # Sync endpoints hold a pooled connection for their whole run on the threadpool, so
+    # the threadpool should never be what caps concurrency below the database pool.
+    if pool_capacity is None:
+        return
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, pool_capacity)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with habit_mcp.session_manager.run():
+    # Deployments that run ``python -m backend.migrate`` as a release step can set
+    # RUN_STARTUP_MIGRATIONS=0 so workers boot without touching the schema.
+    if os.getenv("RUN_STARTUP_MIGRATIONS", "1").lower() in {"1", "true", "yes"}:
+        _prepare_database()
+    _size_threadpool()
+    async with habit_mcp.session_manager.run(), _userinfo_http_client() as http_client:
+        app.state.http_client = http_client
         if os.getenv("DEBUG_STARTUP") in {"1", "true", "TRUE"}:
             logger.info("🚀 FastAPI application starting up...")
             logger.info(f"Python version: {__import__('sys').version}")
@@ -119,6 +249,16 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(lifespan=lifespan)
 
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(5 * 1024 * 1024)))  # 5 MB default
+# Allowance for the multipart boundaries and part headers around the file itself.
+UPLOAD_ENVELOPE_BYTES = 8192
+
+# Registered before CORS so that early 413 responses still carry CORS headers.
+app.add_middleware(
+    LimitUploadSizeMiddleware,
+    max_body_size=MAX_UPLOAD_SIZE + UPLOAD_ENVELOPE_BYTES,
+    paths={"/api/upload-profile-picture"},
+)
 
 # Configure CORS to support Expo/web dev hosts. Override with CORS_ALLOW_ORIGINS.
 _cors_env = os.getenv("CORS_ALLOW_ORIGINS") or os.getenv("CORS_ORIGINS", "")
@@ -157,7 +297,7 @@ app.mount("/mcp", mcp_http_app)
 # Startup logs handled by lifespan above
 
 
-@app.get("/health")
+@app.get("/health", response_class=ORJSONResponse)
 def health_check():
     """Health check endpoint for Railway deployment"""
     try:
@@ -165,7 +305,7 @@ def health_check():
             connection.execute(text("SELECT 1"))
     except Exception:
         logger.exception("Database health check failed")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -194,13 +334,13 @@ async def log_http_exception(request: Request, exc: HTTPException):
 @app.exception_handler(Exception)
 async def log_unhandled_exception(request: Request, exc: Exception):
     logger.exception("Unhandled exception for %s %s", request.method, request.url)
-    return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+    return ORJSONResponse(status_code=500, content={"detail": "Internal Server Error"})
 
 
-@app.get("/.well-known/oauth-protected-resource/mcp")
-@app.get("/.well-known/oauth-protected-resource/mcp/")
-@app.options("/.well-known/oauth-protected-resource/mcp")
-@app.options("/.well-known/oauth-protected-resource/mcp/")
+@app.get("/.well-known/oauth-protected-resource/mcp", response_class=ORJSONResponse)
+@app.get("/.well-known/oauth-protected-resource/mcp/", response_class=ORJSONResponse)
+@app.options("/.well-known/oauth-protected-resource/mcp", response_class=ORJSONResponse)
+@app.options("/.well-known/oauth-protected-resource/mcp/", response_class=ORJSONResponse)
 def mcp_protected_resource_metadata():
     return protected_resource_metadata()
 
@@ -213,9 +353,14 @@ def get_db():
         db.close()
 
 
+FALLBACK_NUGGET = "Wisdom comes from experience, and experience comes from making mistakes."
+# The nugget row only changes on regenerate; other workers pick up a new one within the TTL.
+_nugget_cache = TTLCache(maxsize=1, ttl=60)
+
+
 def generate_nugget() -> str:
     if not client:
-        return "Wisdom comes from experience, and experience comes from making mistakes."
+        return FALLBACK_NUGGET
 
     prompt = "Provide a short nugget of wisdom in one sentence."
     try:
@@ -227,42 +372,61 @@ def generate_nugget() -> str:
         return completion.choices[0].message.content.strip()
     except Exception:
         logger.exception("Nugget generation failed; using local fallback")
-        return "Wisdom comes from experience, and experience comes from making mistakes."
+        return FALLBACK_NUGGET
 
 
-@app.get("/api/nugget")
-def read_nugget(
-    db: Session = Depends(get_db),
-    user=Depends(verify_jwt),
-):
+def _load_or_create_nugget_text(db: Session) -> str:
     nugget = db.query(models.Nugget).first()
     if not nugget:
-        text = generate_nugget()
-        nugget = models.Nugget(text=text)
+        nugget = models.Nugget(text=generate_nugget())
         db.add(nugget)
         db.commit()
-        db.refresh(nugget)
-    return {"text": nugget.text}
+    return nugget.text
 
 
-@app.post("/api/nugget/regenerate")
-def regenerate_nugget(
-    db: Session = Depends(get_db),
-    user=Depends(verify_jwt),
-):
-    text = generate_nugget()
+def _store_nugget_text(db: Session, text: str) -> None:
     nugget = db.query(models.Nugget).first()
     if not nugget:
-        nugget = models.Nugget(text=text)
-        db.add(nugget)
+        db.add(models.Nugget(text=text))
+    elif nugget.text == text:
+        return
     else:
         nugget.text = text
     db.commit()
-    db.refresh(nugget)
-    return {"text": nugget.text}
+
+
+@app.get("/api/nugget", response_class=ORJSONResponse)
+async def read_nugget(
+    db: Session = Depends(get_db),
+    user=Depends(verify_jwt),
+):
+    text = _nugget_cache.get("text")
+    if text is None:
+        text = await run_in_threadpool(_load_or_create_nugget_text, db)
+        _nugget_cache.set("text", text)
+    return {"text": text}
+
+
+@app.post("/api/nugget/regenerate", response_class=ORJSONResponse)
+async def regenerate_nugget(
+    db: Session = Depends(get_db),
+    user=Depends(verify_jwt),
+):
+    text = await run_in_threadpool(generate_nugget)
+    # Without OpenAI every regeneration yields the fallback; skip rewriting it.
+    if text != _nugget_cache.get("text"):
+        await run_in_threadpool(_store_nugget_text, db, text)
+    _nugget_cache.set("text", text)
+    return {"text": text}
 
 
 # Pydantic models for habit tracking
+
+# JSON columns in response models. Rows loaded from the database already hold plain
+# JSON, so they are passed through instead of rebuilding every dict on the way out.
+StoredJSON = Annotated[Any, WithJsonSchema({"anyOf": [{"type": "object"}, {"type": "null"}]})]
+
+
 class SettingsIn(BaseModel):
     name: str | None = None
     nickname: str | None = None
@@ -302,12 +466,16 @@ class HabitUpdate(BaseModel):
 class HabitResponse(HabitBase):
     id: int
     user_id: str
+    count_settings: StoredJSON = None
+    weight_settings: StoredJSON = None
+    schedule_settings: StoredJSON = None
+    reward_settings: StoredJSON = None
+    display_settings: StoredJSON = None
     deleted_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SubHabitBase(BaseModel):
@@ -330,13 +498,13 @@ class SubHabitUpdate(BaseModel):
 
 class SubHabitResponse(SubHabitBase):
     id: int
+    reward_settings: StoredJSON = None
     parent_habit_id: int
     user_id: str
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CheckCreate(BaseModel):
@@ -354,12 +522,11 @@ class CheckResponse(BaseModel):
     sub_habit_id: Optional[int] = None
     checked: bool
     check_date: datetime
-    metadata_json: Optional[Dict[str, Any]] = None
+    metadata_json: StoredJSON = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CountCreate(BaseModel):
@@ -375,12 +542,11 @@ class CountResponse(BaseModel):
     habit_id: int
     value: float
     count_date: datetime
-    metadata_json: Optional[Dict[str, Any]] = None
+    metadata_json: StoredJSON = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class WeightUpdateCreate(BaseModel):
@@ -396,12 +562,11 @@ class WeightUpdateResponse(BaseModel):
     habit_id: int
     weight: float
     update_date: datetime
-    metadata_json: Optional[Dict[str, Any]] = None
+    metadata_json: StoredJSON = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ActiveDayCreate(BaseModel):
@@ -415,12 +580,11 @@ class ActiveDayResponse(BaseModel):
     user_id: str
     date: datetime
     validated: bool
-    summary_data: Optional[Dict[str, Any]] = None
+    summary_data: StoredJSON = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserCreate(BaseModel):
@@ -453,12 +617,27 @@ class UserResponse(BaseModel):
     name: Optional[str] = None
     nickname: Optional[str] = None
     image_url: Optional[str] = None
-    settings: Optional[Dict[str, Any]] = None
+    settings: StoredJSON = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# List endpoints keep ``response_model`` for the OpenAPI schema but return a ready
+# ``Response``: FastAPI then skips its own validation pass, which sync endpoints run on
+# an extra trip through the threadpool.
+_habits_adapter = TypeAdapter(List[HabitResponse])
+_sub_habits_adapter = TypeAdapter(List[SubHabitResponse])
+_checks_adapter = TypeAdapter(List[CheckResponse])
+_counts_adapter = TypeAdapter(List[CountResponse])
+_weight_updates_adapter = TypeAdapter(List[WeightUpdateResponse])
+_active_days_adapter = TypeAdapter(List[ActiveDayResponse])
+
+
+def _rows_response(adapter: TypeAdapter, rows) -> Response:
+    items = adapter.validate_python(rows, from_attributes=True)
+    return Response(adapter.dump_json(items), media_type="application/json")
 
 
 # User management endpoints
@@ -469,7 +648,7 @@ def create_user(
     current_user=Depends(verify_jwt),
 ):
     # Check if user already exists
-    existing_user = db.query(models.User).filter(models.User.id == current_user["sub"]).first()
+    existing_user = db.get(models.User, current_user["sub"])
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
@@ -487,41 +666,60 @@ def create_user(
     return db_user
 
 
-@app.get("/api/users/me", response_model=UserResponse)
-def get_current_user(
-    db: Session = Depends(get_db),
-    current_user=Depends(verify_jwt),
-):
-    user = db.query(models.User).filter(models.User.id == current_user["sub"]).first()
-    if not user:
-        # Auto-create user if doesn't exist
-        email = current_user.get("email") or f"{current_user['sub']}@users.invalid"
+def _insert_user_from_claims(db: Session, claims: dict, email: str) -> Optional["models.User"]:
+    # Concurrent first logins race to create the row; a conflict on the id returns None
+    # and the caller reads the winner.
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
         user = models.User(
-            id=current_user["sub"],
+            id=claims["sub"],
             email=email,
-            name=current_user.get("name"),
-            nickname=current_user.get("nickname"),
-            image_url=current_user.get("picture"),
+            name=claims.get("name"),
+            nickname=claims.get("nickname"),
+            image_url=claims.get("picture"),
         )
         db.add(user)
         try:
-            db.commit()
-            db.refresh(user)
+            db.flush()
         except IntegrityError:
             db.rollback()
-            user = db.query(models.User).filter(models.User.id == current_user["sub"]).first()
-            if not user:
-                user = models.User(
-                    id=current_user["sub"],
-                    email=f"{current_user['sub']}@users.invalid",
-                    name=current_user.get("name"),
-                    nickname=current_user.get("nickname"),
-                    image_url=current_user.get("picture"),
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-    return user
+            if db.get(models.User, claims["sub"]):
+                return None
+            raise
+        return user
+    return db.scalars(
+        dialect_insert(models.User)
+        .values(
+            id=claims["sub"],
+            email=email,
+            name=claims.get("name"),
+            nickname=claims.get("nickname"),
+            image_url=claims.get("picture"),
+        )
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(models.User)
+    ).first()
+
+
+@app.get("/api/users/me", response_model=UserResponse)
+def get_current_user(
+    db: Session = Depends(get_db),
+    current_user=Depends(verify_jwt),
+):
+    user = db.get(models.User, current_user["sub"])
+    if user:
+        return user
+
+    # Auto-create user if doesn't exist
+    email = current_user.get("email") or f"{current_user['sub']}@users.invalid"
+    try:
+        user = _insert_user_from_claims(db, current_user, email)
+    except IntegrityError:
+        # The email already belongs to another account
+        db.rollback()
+        user = _insert_user_from_claims(db, current_user, f"{current_user['sub']}@users.invalid")
+    db.commit()
+    return user or db.get(models.User, current_user["sub"])
 
 
 @app.put("/api/users/me", response_model=UserResponse)
@@ -530,19 +728,25 @@ def update_current_user(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    user = db.query(models.User).filter(models.User.id == current_user["sub"]).first()
+    user = db.get(models.User, current_user["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     updates = user_data.model_dump(exclude_unset=True)
     settings_patch = updates.pop("settings", None)
-    for field, value in updates.items():
-        setattr(user, field, value)
     if settings_patch is not None:
-        user.settings = {**(user.settings or {}), **settings_patch}
-
+        # The settings patch is merged into the stored JSON, which needs the row loaded.
+        updates["settings"] = {**(user.settings or {}), **settings_patch}
+    if not updates:
+        return user
+
+    user = db.scalars(
+        update(models.User)
+        .where(models.User.id == user.id)
+        .values(**updates)
+        .returning(models.User)
+    ).one()
     db.commit()
-    db.refresh(user)
     return user
 
 
@@ -571,6 +775,11 @@ def adjust_reward_balance(
 
 
 # Habit management endpoints
+# List queries are built once; requests only append their optional filters and bind
+# the caller's user_id.
+_HABITS_QUERY = select(models.Habit).where(models.Habit.user_id == bindparam("user_id"))
+
+
 @app.get("/api/habits", response_model=List[HabitResponse])
 def get_habits(
     skip: int = 0,
@@ -579,11 +788,11 @@ def get_habits(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    query = db.query(models.Habit).filter(models.Habit.user_id == current_user["sub"])
+    stmt = _HABITS_QUERY
     if not include_deleted:
-        query = query.filter(models.Habit.deleted_at.is_(None))
-    habits = query.offset(skip).limit(limit).all()
-    return habits
+        stmt = stmt.where(models.Habit.deleted_at.is_(None))
+    habits = db.scalars(stmt.offset(skip).limit(limit), {"user_id": current_user["sub"]}).all()
+    return _rows_response(_habits_adapter, habits)
 
 
 @app.post("/api/habits", response_model=HabitResponse)
@@ -599,19 +808,32 @@ def create_habit(
     return db_habit
 
 
+def _get_owned_habit(db: Session, habit_id: int, user_id: str) -> "models.Habit":
+    # Primary-key lookup; ownership is checked on the loaded row.
+    habit = db.get(models.Habit, habit_id)
+    if habit is None or habit.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Habit not found")
+    return habit
+
+
+def _update_owned(db: Session, model, row_id: int, user_id: str, values: dict) -> Optional[Any]:
+    """Apply ``values`` to the caller's row in one ``UPDATE ... RETURNING`` round trip.
+
+    Returns the updated row, or None when no row with that id belongs to ``user_id``.
+    """
+    owned = (model.id == row_id, model.user_id == user_id)
+    if not values:
+        return db.scalars(select(model).where(*owned)).first()
+    return db.scalars(update(model).where(*owned).values(**values).returning(model)).first()
+
+
 @app.get("/api/habits/{habit_id}", response_model=HabitResponse)
 def get_habit(
     habit_id: int,
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user["sub"])
-        .first()
-    )
-    if not habit:
-        raise HTTPException(status_code=404, detail="Habit not found")
+    habit = _get_owned_habit(db, habit_id, current_user["sub"])
     return habit
 
 
@@ -622,41 +844,54 @@ def update_habit(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user["sub"])
-        .first()
+    habit = _update_owned(
+        db,
+        models.Habit,
+        habit_id,
+        current_user["sub"],
+        habit_update.model_dump(exclude_unset=True),
     )
-    if not habit:
+    if habit is None:
         raise HTTPException(status_code=404, detail="Habit not found")
-
-    for field, value in habit_update.model_dump(exclude_unset=True).items():
-        setattr(habit, field, value)
-
     db.commit()
-    db.refresh(habit)
     return habit
 
 
-@app.delete("/api/habits/{habit_id}")
+def _delete_habit_rows(db: Session, habit_id: int) -> None:
+    # Bulk deletes, children first, instead of the ORM cascade loading every child row
+    # and deleting them one by one. The foreign keys have no ON DELETE clause, so the
+    # children cannot be left to the database.
+    sub_habit_ids = select(models.SubHabit.id).where(models.SubHabit.parent_habit_id == habit_id)
+    for statement in (
+        delete(models.Check).where(
+            or_(models.Check.habit_id == habit_id, models.Check.sub_habit_id.in_(sub_habit_ids))
+        ),
+        delete(models.Count).where(models.Count.habit_id == habit_id),
+        delete(models.WeightUpdate).where(models.WeightUpdate.habit_id == habit_id),
+        delete(models.SubHabit).where(models.SubHabit.parent_habit_id == habit_id),
+        delete(models.Habit).where(models.Habit.id == habit_id),
+    ):
+        db.execute(statement, execution_options={"synchronize_session": False})
+
+
+@app.delete("/api/habits/{habit_id}", response_class=ORJSONResponse)
 def delete_habit(
     habit_id: int,
     hard_delete: bool = False,
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user["sub"])
-        .first()
-    )
-    if not habit:
-        raise HTTPException(status_code=404, detail="Habit not found")
-
     if hard_delete:
-        db.delete(habit)
+        _get_owned_habit(db, habit_id, current_user["sub"])
+        _delete_habit_rows(db, habit_id)
     else:
-        habit.deleted_at = datetime.now(timezone.utc)
+        result = db.execute(
+            update(models.Habit)
+            .where(models.Habit.id == habit_id, models.Habit.user_id == current_user["sub"])
+            .values(deleted_at=datetime.now(timezone.utc))
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Habit not found")
 
     db.commit()
     return {"ok": True}
@@ -670,13 +905,7 @@ def get_sub_habits(
     current_user=Depends(verify_jwt),
 ):
     # Verify habit ownership
-    habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user["sub"])
-        .first()
-    )
-    if not habit:
-        raise HTTPException(status_code=404, detail="Habit not found")
+    _get_owned_habit(db, habit_id, current_user["sub"])
 
     sub_habits = (
         db.query(models.SubHabit)
@@ -687,7 +916,28 @@ def get_sub_habits(
         .order_by(models.SubHabit.order_index)
         .all()
     )
-    return sub_habits
+    return _rows_response(_sub_habits_adapter, sub_habits)
+
+
+def _insert_if(db: Session, model, values: dict, *conditions) -> Optional[Any]:
+    """Insert ``values`` as a ``model`` row only if all ``conditions`` hold.
+
+    The ownership check, the insert and the read-back happen in one
+    ``INSERT ... SELECT ... WHERE ... RETURNING`` round trip. Returns the new row,
+    or None when the conditions filtered it out.
+    """
+    columns = model.__table__.c
+    row = select(
+        *[
+            value if isinstance(value, ColumnElement) else literal(value, columns[name].type)
+            for name, value in values.items()
+        ]
+    ).where(*conditions)
+    return db.scalars(insert(model).from_select(list(values), row).returning(model)).first()
+
+
+def _owned_habit(habit_id: int, user_id: str, *criteria):
+    return exists().where(models.Habit.id == habit_id, models.Habit.user_id == user_id, *criteria)
 
 
 @app.post("/api/sub-habits", response_model=SubHabitResponse)
@@ -696,22 +946,16 @@ def create_sub_habit(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    # Verify parent habit ownership
-    habit = (
-        db.query(models.Habit)
-        .filter(
-            models.Habit.id == sub_habit.parent_habit_id,
-            models.Habit.user_id == current_user["sub"],
-        )
-        .first()
+    user_id = current_user["sub"]
+    db_sub_habit = _insert_if(
+        db,
+        models.SubHabit,
+        {"user_id": user_id, **sub_habit.model_dump()},
+        _owned_habit(sub_habit.parent_habit_id, user_id),
     )
-    if not habit:
+    if db_sub_habit is None:
         raise HTTPException(status_code=404, detail="Parent habit not found")
-
-    db_sub_habit = models.SubHabit(user_id=current_user["sub"], **sub_habit.model_dump())
-    db.add(db_sub_habit)
     db.commit()
-    db.refresh(db_sub_habit)
     return db_sub_habit
 
 
@@ -722,23 +966,20 @@ def update_sub_habit(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    sub_habit = (
-        db.query(models.SubHabit)
-        .filter(models.SubHabit.id == sub_habit_id, models.SubHabit.user_id == current_user["sub"])
-        .first()
+    sub_habit = _update_owned(
+        db,
+        models.SubHabit,
+        sub_habit_id,
+        current_user["sub"],
+        sub_habit_update.model_dump(exclude_unset=True),
     )
-    if not sub_habit:
+    if sub_habit is None:
         raise HTTPException(status_code=404, detail="Sub-habit not found")
-
-    for field, value in sub_habit_update.model_dump(exclude_unset=True).items():
-        setattr(sub_habit, field, value)
-
     db.commit()
-    db.refresh(sub_habit)
     return sub_habit
 
 
-@app.delete("/api/sub-habits/{sub_habit_id}")
+@app.delete("/api/sub-habits/{sub_habit_id}", response_class=ORJSONResponse)
 def delete_sub_habit(
     sub_habit_id: int,
     db: Session = Depends(get_db),
@@ -758,6 +999,13 @@ def delete_sub_habit(
 
 
 # Check/uncheck endpoints
+_CHECKS_QUERY = (
+    select(models.Check)
+    .where(models.Check.user_id == bindparam("user_id"))
+    .order_by(models.Check.check_date.desc())
+)
+
+
 @app.get("/api/checks", response_model=List[CheckResponse])
 def get_checks(
     habit_id: Optional[int] = None,
@@ -769,38 +1017,30 @@ def get_checks(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    query = db.query(models.Check).filter(models.Check.user_id == current_user["sub"])
+    stmt = _CHECKS_QUERY
 
     if habit_id:
-        query = query.filter(models.Check.habit_id == habit_id)
+        stmt = stmt.where(models.Check.habit_id == habit_id)
     if sub_habit_id:
-        query = query.filter(models.Check.sub_habit_id == sub_habit_id)
+        stmt = stmt.where(models.Check.sub_habit_id == sub_habit_id)
     if start_date:
-        query = query.filter(models.Check.check_date >= start_date)
+        stmt = stmt.where(models.Check.check_date >= start_date)
     if end_date:
-        query = query.filter(models.Check.check_date <= end_date)
+        stmt = stmt.where(models.Check.check_date <= end_date)
 
-    checks = query.order_by(models.Check.check_date.desc()).offset(skip).limit(limit).all()
-    return checks
+    checks = db.scalars(stmt.offset(skip).limit(limit), {"user_id": current_user["sub"]}).all()
+    return _rows_response(_checks_adapter, checks)
 
 
-@app.post("/api/checks", response_model=CheckResponse)
-def create_check(
-    check: CheckCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(verify_jwt),
-):
-    if check.habit_id is None and check.sub_habit_id is None:
-        raise HTTPException(status_code=422, detail="A habit or sub-habit is required")
-
-    # Verify ownership of habit or sub-habit
+def _resolve_check_habit_id(db: Session, check: CheckCreate, user_id: str) -> int:
+    """Return the habit a check belongs to, raising if the caller does not own it."""
     resolved_habit_id = check.habit_id
     if resolved_habit_id:
         habit = (
-            db.query(models.Habit)
+            db.query(models.Habit.id)
             .filter(
                 models.Habit.id == resolved_habit_id,
-                models.Habit.user_id == current_user["sub"],
+                models.Habit.user_id == user_id,
                 models.Habit.deleted_at.is_(None),
             )
             .first()
@@ -808,48 +1048,86 @@ def create_check(
         if not habit:
             raise HTTPException(status_code=404, detail="Habit not found")
 
-    sub_habit_parent_id = None
     if check.sub_habit_id:
-        sub_habit = (
-            db.query(models.SubHabit)
+        sub_habit_parent_id = (
+            db.query(models.SubHabit.parent_habit_id)
             .filter(
                 models.SubHabit.id == check.sub_habit_id,
-                models.SubHabit.user_id == current_user["sub"],
+                models.SubHabit.user_id == user_id,
             )
-            .first()
+            .scalar()
         )
-        if not sub_habit:
+        if sub_habit_parent_id is None:
             raise HTTPException(status_code=404, detail="Sub-habit not found")
-        sub_habit_parent_id = sub_habit.parent_habit_id
         if resolved_habit_id and resolved_habit_id != sub_habit_parent_id:
             raise HTTPException(status_code=400, detail="Sub-habit does not belong to habit")
         resolved_habit_id = resolved_habit_id or sub_habit_parent_id
 
+    return resolved_habit_id
+
+
+def _matching_check(user_id: str, habit_id, check: CheckCreate):
+    return (
+        models.Check.user_id == user_id,
+        models.Check.habit_id == habit_id,
+        models.Check.sub_habit_id == check.sub_habit_id,
+        models.Check.check_date == check.check_date,
+        models.Check.checked == check.checked,
+    )
+
+
+@app.post("/api/checks", response_model=CheckResponse)
+def create_check(
+    check: CheckCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(verify_jwt),
+):
+    if check.habit_id is None and check.sub_habit_id is None:
+        raise HTTPException(status_code=422, detail="A habit or sub-habit is required")
+
+    # Fast path: ownership, parent resolution and duplicate detection are all part of
+    # the INSERT, so a new check costs one round trip.
+    user_id = current_user["sub"]
+    conditions = []
+    habit_id = check.habit_id
+    if check.habit_id:
+        conditions.append(_owned_habit(check.habit_id, user_id, models.Habit.deleted_at.is_(None)))
+    if check.sub_habit_id:
+        owned_sub_habit = select(models.SubHabit.parent_habit_id).where(
+            models.SubHabit.id == check.sub_habit_id, models.SubHabit.user_id == user_id
+        )
+        if check.habit_id:
+            owned_sub_habit = owned_sub_habit.where(
+                models.SubHabit.parent_habit_id == check.habit_id
+            )
+        conditions.append(owned_sub_habit.exists())
+        habit_id = habit_id or owned_sub_habit.scalar_subquery()
+    conditions.append(~exists().where(*_matching_check(user_id, habit_id, check)))
+
     check_data = check.model_dump()
-    check_data["habit_id"] = resolved_habit_id
+    check_data["habit_id"] = habit_id
+    db_check = _insert_if(db, models.Check, {"user_id": user_id, **check_data}, *conditions)
+    if db_check is not None:
+        db.commit()
+        return db_check
 
+    # Nothing was inserted: report why, or return the check that already exists.
+    resolved_habit_id = _resolve_check_habit_id(db, check, user_id)
     existing = (
-        db.query(models.Check)
-        .filter(
-            models.Check.user_id == current_user["sub"],
-            models.Check.habit_id == resolved_habit_id,
-            models.Check.sub_habit_id == check.sub_habit_id,
-            models.Check.check_date == check.check_date,
-            models.Check.checked == check.checked,
-        )
-        .first()
+        db.query(models.Check).filter(*_matching_check(user_id, resolved_habit_id, check)).first()
     )
     if existing:
         return existing
 
-    db_check = models.Check(user_id=current_user["sub"], **check_data)
+    check_data["habit_id"] = resolved_habit_id
+    db_check = models.Check(user_id=user_id, **check_data)
     db.add(db_check)
     db.commit()
     db.refresh(db_check)
     return db_check
 
 
-@app.delete("/api/checks/{check_id}")
+@app.delete("/api/checks/{check_id}", response_class=ORJSONResponse)
 def delete_check(
     check_id: int,
     db: Session = Depends(get_db),
@@ -869,6 +1147,13 @@ def delete_check(
 
 
 # Count tracking endpoints
+_COUNTS_QUERY = (
+    select(models.Count)
+    .where(models.Count.user_id == bindparam("user_id"))
+    .order_by(models.Count.count_date.desc())
+)
+
+
 @app.get("/api/counts", response_model=List[CountResponse])
 def get_counts(
     habit_id: Optional[int] = None,
@@ -879,17 +1164,17 @@ def get_counts(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    query = db.query(models.Count).filter(models.Count.user_id == current_user["sub"])
+    stmt = _COUNTS_QUERY
 
     if habit_id:
-        query = query.filter(models.Count.habit_id == habit_id)
+        stmt = stmt.where(models.Count.habit_id == habit_id)
     if start_date:
-        query = query.filter(models.Count.count_date >= start_date)
+        stmt = stmt.where(models.Count.count_date >= start_date)
     if end_date:
-        query = query.filter(models.Count.count_date <= end_date)
+        stmt = stmt.where(models.Count.count_date <= end_date)
 
-    counts = query.order_by(models.Count.count_date.desc()).offset(skip).limit(limit).all()
-    return counts
+    counts = db.scalars(stmt.offset(skip).limit(limit), {"user_id": current_user["sub"]}).all()
+    return _rows_response(_counts_adapter, counts)
 
 
 @app.post("/api/counts", response_model=CountResponse)
@@ -898,12 +1183,29 @@ def create_count(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    # Verify habit ownership
+    user_id = current_user["sub"]
+    db_count = None
+    if math.isfinite(count.value):
+        db_count = _insert_if(
+            db,
+            models.Count,
+            {"user_id": user_id, **count.model_dump()},
+            _owned_habit(
+                count.habit_id,
+                user_id,
+                models.Habit.deleted_at.is_(None),
+                models.Habit.has_counts.is_(True),
+            ),
+        )
+    if db_count is not None:
+        db.commit()
+        return db_count
+
     habit = (
-        db.query(models.Habit)
+        db.query(models.Habit.has_counts)
         .filter(
             models.Habit.id == count.habit_id,
-            models.Habit.user_id == current_user["sub"],
+            models.Habit.user_id == user_id,
             models.Habit.deleted_at.is_(None),
         )
         .first()
@@ -912,17 +1214,17 @@ def create_count(
         raise HTTPException(status_code=404, detail="Habit not found")
     if not habit.has_counts:
         raise HTTPException(status_code=422, detail="Habit does not support counts")
-    if not math.isfinite(count.value):
-        raise HTTPException(status_code=422, detail="Count value must be finite")
-
-    db_count = models.Count(user_id=current_user["sub"], **count.model_dump())
-    db.add(db_count)
-    db.commit()
-    db.refresh(db_count)
-    return db_count
+    raise HTTPException(status_code=422, detail="Count value must be finite")
 
 
 # Weight tracking endpoints
+_WEIGHT_UPDATES_QUERY = (
+    select(models.WeightUpdate)
+    .where(models.WeightUpdate.user_id == bindparam("user_id"))
+    .order_by(models.WeightUpdate.update_date.desc())
+)
+
+
 @app.get("/api/weight-updates", response_model=List[WeightUpdateResponse])
 def get_weight_updates(
     habit_id: Optional[int] = None,
@@ -933,19 +1235,19 @@ def get_weight_updates(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    query = db.query(models.WeightUpdate).filter(models.WeightUpdate.user_id == current_user["sub"])
+    stmt = _WEIGHT_UPDATES_QUERY
 
     if habit_id:
-        query = query.filter(models.WeightUpdate.habit_id == habit_id)
+        stmt = stmt.where(models.WeightUpdate.habit_id == habit_id)
     if start_date:
-        query = query.filter(models.WeightUpdate.update_date >= start_date)
+        stmt = stmt.where(models.WeightUpdate.update_date >= start_date)
     if end_date:
-        query = query.filter(models.WeightUpdate.update_date <= end_date)
+        stmt = stmt.where(models.WeightUpdate.update_date <= end_date)
 
-    weight_updates = (
-        query.order_by(models.WeightUpdate.update_date.desc()).offset(skip).limit(limit).all()
-    )
-    return weight_updates
+    weight_updates = db.scalars(
+        stmt.offset(skip).limit(limit), {"user_id": current_user["sub"]}
+    ).all()
+    return _rows_response(_weight_updates_adapter, weight_updates)
 
 
 @app.post("/api/weight-updates", response_model=WeightUpdateResponse)
@@ -954,12 +1256,29 @@ def create_weight_update(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    # Verify habit ownership
+    user_id = current_user["sub"]
+    db_weight_update = None
+    if math.isfinite(weight_update.weight) and weight_update.weight > 0:
+        db_weight_update = _insert_if(
+            db,
+            models.WeightUpdate,
+            {"user_id": user_id, **weight_update.model_dump()},
+            _owned_habit(
+                weight_update.habit_id,
+                user_id,
+                models.Habit.deleted_at.is_(None),
+                models.Habit.is_weight.is_(True),
+            ),
+        )
+    if db_weight_update is not None:
+        db.commit()
+        return db_weight_update
+
     habit = (
-        db.query(models.Habit)
+        db.query(models.Habit.is_weight)
         .filter(
             models.Habit.id == weight_update.habit_id,
-            models.Habit.user_id == current_user["sub"],
+            models.Habit.user_id == user_id,
             models.Habit.deleted_at.is_(None),
         )
         .first()
@@ -968,19 +1287,17 @@ def create_weight_update(
         raise HTTPException(status_code=404, detail="Habit not found")
     if not habit.is_weight:
         raise HTTPException(status_code=422, detail="Habit does not support weight updates")
-    if not math.isfinite(weight_update.weight) or weight_update.weight <= 0:
-        raise HTTPException(status_code=422, detail="Weight must be a positive finite number")
-
-    db_weight_update = models.WeightUpdate(
-        user_id=current_user["sub"], **weight_update.model_dump()
-    )
-    db.add(db_weight_update)
-    db.commit()
-    db.refresh(db_weight_update)
-    return db_weight_update
+    raise HTTPException(status_code=422, detail="Weight must be a positive finite number")
 
 
 # Active day tracking endpoints
+_ACTIVE_DAYS_QUERY = (
+    select(models.ActiveDay)
+    .where(models.ActiveDay.user_id == bindparam("user_id"))
+    .order_by(models.ActiveDay.date.desc())
+)
+
+
 @app.get("/api/active-days", response_model=List[ActiveDayResponse])
 def get_active_days(
     start_date: Optional[datetime] = None,
@@ -990,15 +1307,15 @@ def get_active_days(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    query = db.query(models.ActiveDay).filter(models.ActiveDay.user_id == current_user["sub"])
+    stmt = _ACTIVE_DAYS_QUERY
 
     if start_date:
-        query = query.filter(models.ActiveDay.date >= start_date)
+        stmt = stmt.where(models.ActiveDay.date >= start_date)
     if end_date:
-        query = query.filter(models.ActiveDay.date <= end_date)
+        stmt = stmt.where(models.ActiveDay.date <= end_date)
 
-    active_days = query.order_by(models.ActiveDay.date.desc()).offset(skip).limit(limit).all()
-    return active_days
+    active_days = db.scalars(stmt.offset(skip).limit(limit), {"user_id": current_user["sub"]}).all()
+    return _rows_response(_active_days_adapter, active_days)
 
 
 @app.post("/api/active-days", response_model=ActiveDayResponse)
@@ -1007,10 +1324,13 @@ def create_active_day(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    db_active_day = models.ActiveDay(user_id=current_user["sub"], **active_day.model_dump())
-    db.add(db_active_day)
+    # RETURNING hands back the server-filled columns, so no refresh query is needed.
+    db_active_day = db.scalars(
+        insert(models.ActiveDay)
+        .values(user_id=current_user["sub"], **active_day.model_dump())
+        .returning(models.ActiveDay)
+    ).one()
     db.commit()
-    db.refresh(db_active_day)
     return db_active_day
 
 
@@ -1022,23 +1342,16 @@ def update_active_day(
     db: Session = Depends(get_db),
     current_user=Depends(verify_jwt),
 ):
-    active_day = (
-        db.query(models.ActiveDay)
-        .filter(
-            models.ActiveDay.id == active_day_id, models.ActiveDay.user_id == current_user["sub"]
-        )
-        .first()
-    )
-    if not active_day:
-        raise HTTPException(status_code=404, detail="Active day not found")
-
+    values = {}
     if validated is not None:
-        active_day.validated = validated
+        values["validated"] = validated
     if summary_data is not None:
-        active_day.summary_data = summary_data
+        values["summary_data"] = summary_data
 
+    active_day = _update_owned(db, models.ActiveDay, active_day_id, current_user["sub"], values)
+    if active_day is None:
+        raise HTTPException(status_code=404, detail="Active day not found")
     db.commit()
-    db.refresh(active_day)
     return active_day
 
 
@@ -1047,14 +1360,18 @@ ALLOWED_CONTENT_TYPES = {
     "image/jpeg": ".jpg",
     "image/jpg": ".jpg",
 }
-MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(5 * 1024 * 1024)))  # 5 MB default
 
 
-def _profile_picture_key(user_sub: str, filename: str | None, content_type: str) -> str:
+# Keys are derived from the image bytes, so an object never changes once written.
+PROFILE_PICTURE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _profile_picture_key(user_sub: str, payload: bytes, content_type: str) -> str:
     ext = ALLOWED_CONTENT_TYPES[content_type]
 
     user_hash = sha256(user_sub.encode("utf-8")).hexdigest()[:32]
-    return f"profile_pics/{user_hash}/{uuid4().hex}{ext.lower()}"
+    content_hash = sha256(payload).hexdigest()
+    return f"profile_pics/{user_hash}/{content_hash}{ext.lower()}"
 
 
 def _request_base_url(request: Request) -> str:
@@ -1065,14 +1382,41 @@ def _request_base_url(request: Request) -> str:
     return str(request.base_url).rstrip("/")
 
 
-@app.post("/api/upload-profile-picture")
-def upload_profile_picture(
+def _validate_profile_picture(payload: bytes, content_type: str) -> None:
+    expected_formats = {"image/png": "PNG", "image/jpeg": "JPEG", "image/jpg": "JPEG"}
+    try:
+        with Image.open(BytesIO(payload)) as image:
+            image.verify()
+            if image.format != expected_formats[content_type]:
+                raise HTTPException(status_code=400, detail="Image content does not match type")
+    except (UnidentifiedImageError, OSError):
+        raise HTTPException(status_code=400, detail="Invalid image")
+
+
+def _store_profile_picture(key: str, payload: bytes, content_type: str) -> None:
+    if profile_picture_storage.object_exists(key):
+        logger.info("Profile picture already stored at object storage key: %s", key)
+        return
+    logger.info("Uploading profile picture to object storage key: %s", key)
+    profile_picture_storage.upload_bytes(
+        payload,
+        key,
+        content_type=content_type,
+        cache_control=PROFILE_PICTURE_CACHE_CONTROL,
+    )
+
+
+@app.post("/api/upload-profile-picture", response_class=ORJSONResponse)
+async def upload_profile_picture(
     request: Request,
     file: UploadFile = File(...),
     user=Depends(verify_jwt),
 ):
     logger.info(
-        f"Upload request - filename: {file.filename}, content_type: {file.content_type}, size: {getattr(file, 'size', 'unknown')}"
+        "Upload request - filename: %s, content_type: %s, size: %s",
+        file.filename,
+        file.content_type,
+        getattr(file, "size", "unknown"),
     )
 
     if not profile_picture_storage:
@@ -1084,32 +1428,23 @@ def upload_profile_picture(
         if content_type not in ALLOWED_CONTENT_TYPES:
             raise HTTPException(status_code=400, detail="Unsupported content type")
 
-        payload = file.file.read(MAX_UPLOAD_SIZE + 1)
+        payload = await file.read(MAX_UPLOAD_SIZE + 1)
         if len(payload) > MAX_UPLOAD_SIZE:
             raise HTTPException(status_code=413, detail="File too large")
         if not payload:
             raise HTTPException(status_code=400, detail="Empty image")
 
-        expected_formats = {"image/png": "PNG", "image/jpeg": "JPEG", "image/jpg": "JPEG"}
-        try:
-            with Image.open(BytesIO(payload)) as image:
-                image.verify()
-                if image.format != expected_formats[content_type]:
-                    raise HTTPException(status_code=400, detail="Image content does not match type")
-        except (UnidentifiedImageError, OSError):
-            raise HTTPException(status_code=400, detail="Invalid image")
-
-        key = _profile_picture_key(user["sub"], file.filename, content_type)
-        logger.info(f"Uploading profile picture to object storage key: {key}")
-
-        profile_picture_storage.upload_fileobj(BytesIO(payload), key, content_type=content_type)
+        # Image decoding and the boto3 calls block, so keep them off the event loop.
+        await run_in_threadpool(_validate_profile_picture, payload, content_type)
+        key = _profile_picture_key(user["sub"], payload, content_type)
+        await run_in_threadpool(_store_profile_picture, key, payload, content_type)
         url = profile_picture_storage.public_object_url(key, _request_base_url(request))
-        logger.info(f"Upload successful, URL: {url}")
+        logger.info("Upload successful, URL: %s", url)
         return {"url": url}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Upload failed: {str(e)}")
+        logger.error("Upload failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
@@ -1123,36 +1458,49 @@ def get_profile_picture(object_key: str):
     try:
         signed_url = profile_picture_storage.presigned_get_url(object_key, expires_in=3600)
     except Exception as e:
-        logger.error(f"Failed to generate profile picture URL: {e}")
+        logger.error("Failed to generate profile picture URL: %s", e)
         raise HTTPException(status_code=404, detail="Profile picture not found")
 
     return RedirectResponse(signed_url, status_code=307)
 
 
-def fetch_auth0_userinfo(access_token: str) -> dict:
+async def fetch_auth0_userinfo(access_token: str, client: httpx.AsyncClient | None = None) -> dict:
     """Fetch user profile information from Auth0 userinfo endpoint"""
 
-    if not AUTH0_DOMAIN:
+    if not AUTH0_USERINFO_URL:
         return {}
 
+    cache_key = sha256(access_token.encode("utf-8")).hexdigest()
+    cached = _userinfo_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(
-            f"https://{AUTH0_DOMAIN}/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"},
-            timeout=10,
-        )
+        if client is None:
+            async with _userinfo_http_client() as one_off_client:
+                response = await _request_userinfo(one_off_client, access_token)
+        else:
+            response = await _request_userinfo(client, access_token)
         if response.status_code == 200:
             userinfo = response.json()
-            logger.info(f"Fetched Auth0 userinfo: {userinfo}")
+            logger.info("Fetched Auth0 userinfo: %s", userinfo)
+            _userinfo_cache.set(cache_key, userinfo)
             return userinfo
         else:
-            logger.warning(f"Failed to fetch userinfo: {response.status_code}")
+            logger.warning("Failed to fetch userinfo: %s", response.status_code)
             return {}
     except Exception as e:
-        logger.error(f"Error fetching Auth0 userinfo: {e}")
+        logger.error("Error fetching Auth0 userinfo: %s", e)
         return {}
 
 
+async def _request_userinfo(client: httpx.AsyncClient, access_token: str) -> httpx.Response:
+    return await client.get(
+        AUTH0_USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+
 def _merge_from_profile(settings: "models.UserSettings", profile_data: dict) -> bool:
     updated = False
     if not settings.name and profile_data.get("name"):
@@ -1179,143 +1527,252 @@ def _merge_from_profile(settings: "models.UserSettings", profile_data: dict) ->
     return updated
 
 
+_DIALECT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def _dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database, if there is one.
+
+    Other dialects return None and callers fall back to ORM adds with an IntegrityError retry.
+    """
+    return _DIALECT_INSERTS.get(db.get_bind().dialect.name)
+
+
 def _get_or_create_user_settings(db: Session, user_id: str) -> "models.UserSettings":
-    settings = db.query(models.UserSettings).filter(models.UserSettings.user_id == user_id).first()
+    settings = db.get(models.UserSettings, user_id)
     if settings:
         return settings
 
-    settings = models.UserSettings(user_id=user_id)
-    db.add(settings)
-    try:
-        db.commit()
-        db.refresh(settings)
-        return settings
-    except IntegrityError:
-        db.rollback()
-        settings = (
-            db.query(models.UserSettings).filter(models.UserSettings.user_id == user_id).first()
-        )
-        if settings:
+    # Concurrent first loads race to create the row; let the database keep the winner.
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        settings = models.UserSettings(user_id=user_id)
+        db.add(settings)
+        try:
+            db.commit()
             return settings
-        raise
+        except IntegrityError:
+            db.rollback()
+            settings = db.get(models.UserSettings, user_id)
+            if settings:
+                return settings
+            raise
+    settings = db.scalars(
+        dialect_insert(models.UserSettings)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+        .returning(models.UserSettings)
+    ).first()
+    db.commit()
+    return settings or db.get(models.UserSettings, user_id)
+
+
+# Complete profiles per user, so navigation does not hit the database or Auth0. Other
+# workers may serve a value up to the TTL old after an update.
+_settings_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _remember_settings(user_id: str, settings: "models.UserSettings") -> dict:
+    response = {
+        "name": settings.name or "",
+        "nickname": settings.nickname or "",
+        "email": settings.email or "",
+        "imageUrl": settings.image_url or "",
+    }
+    # Incomplete profiles are not cached so the next read can still try userinfo.
+    if all(response.values()):
+        _settings_cache.set(user_id, response)
+    else:
+        _settings_cache.pop(user_id)
+    return response
+
+
+def _settings_complete(settings: "models.UserSettings") -> bool:
+    return all((settings.name, settings.nickname, settings.email, settings.image_url))
+
+
+def _load_settings_with_jwt_profile(db: Session, user: dict) -> tuple["models.UserSettings", bool]:
+    settings = _get_or_create_user_settings(db, user["sub"])
+    if _settings_complete(settings):
+        return settings, False
+    updated = _merge_from_profile(
+        settings,
+        {
+            "name": user.get("name"),
+            "nickname": user.get("nickname"),
+            "email": user.get("email"),
+            "picture": user.get("picture"),
+        },
+    )
+    return settings, updated
 
 
-@app.get("/api/settings")
-def read_settings(
+@app.get("/api/settings", response_class=ORJSONResponse)
+async def read_settings(
     db: Session = Depends(get_db),
     user=Depends(verify_jwt),
     request: Request = None,
 ):
-    settings = _get_or_create_user_settings(db, user["sub"])
+    cached = _settings_cache.get(user["sub"])
+    if cached is not None:
+        return cached
 
-    # If any profile fields are missing, try to fetch from Auth0 userinfo endpoint
-    needs_userinfo = not all([settings.name, settings.nickname, settings.email, settings.image_url])
-    userinfo = {}
+    # The session is synchronous, so database work stays off the event loop.
+    # Merge from JWT payload first, then userinfo
+    settings, updated = await run_in_threadpool(_load_settings_with_jwt_profile, db, user)
 
-    if needs_userinfo and request:
+    # If any profile fields are still missing, try to fetch from Auth0 userinfo endpoint
+    if not _settings_complete(settings) and request:
         # Extract access token from Authorization header
         auth_header = request.headers.get("Authorization", "")
         if auth_header.startswith("Bearer "):
             access_token = auth_header[7:]  # Remove "Bearer " prefix
-            userinfo = fetch_auth0_userinfo(access_token)
-
-    # Merge from JWT payload first, then userinfo
-    updated = False
-    if user:
-        updated = _merge_from_profile(
-            settings,
-            {
-                "name": user.get("name"),
-                "nickname": user.get("nickname"),
-                "email": user.get("email"),
-                "picture": user.get("picture"),
-            },
-        )
-    if userinfo:
-        updated = _merge_from_profile(settings, userinfo) or updated
+            http_client = getattr(request.app.state, "http_client", None)
+            userinfo = await fetch_auth0_userinfo(access_token, http_client)
+            if userinfo:
+                updated = _merge_from_profile(settings, userinfo) or updated
 
     if updated:
-        db.commit()
-        db.refresh(settings)
+        await run_in_threadpool(db.commit)
         logger.info(
-            f"Updated settings for user {user['sub']} with name='{settings.name}', nickname='{settings.nickname}', email='{settings.email}', and picture='{settings.image_url}'"
+            "Updated settings for user %s with name='%s', nickname='%s', email='%s', and picture='%s'",
+            user["sub"],
+            settings.name,
+            settings.nickname,
+            settings.email,
+            settings.image_url,
         )
 
-    return {
-        "name": settings.name or "",
-        "nickname": settings.nickname or "",
-        "email": settings.email or "",
-        "imageUrl": settings.image_url or "",
-    }
+    return _remember_settings(user["sub"], settings)
 
 
-@app.post("/api/settings")
+@app.post("/api/settings", response_class=ORJSONResponse)
 def update_settings(
     data: SettingsIn,
     db: Session = Depends(get_db),
     user=Depends(verify_jwt),
 ):
-    settings = _get_or_create_user_settings(db, user["sub"])
-
     # Only update fields that are provided in the request
-    if data.name is not None:
-        settings.name = data.name
-    if data.nickname is not None:
-        settings.nickname = data.nickname
-    if data.email is not None:
-        settings.email = data.email
-    if data.imageUrl is not None:
-        settings.image_url = data.imageUrl
-
+    values = {
+        column: value
+        for column, value in (
+            ("name", data.name),
+            ("nickname", data.nickname),
+            ("email", data.email),
+            ("image_url", data.imageUrl),
+        )
+        if value is not None
+    }
+    if not values:
+        return {"ok": True}
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        settings = _get_or_create_user_settings(db, user["sub"])
+        for column, value in values.items():
+            setattr(settings, column, value)
+        db.commit()
+        _remember_settings(user["sub"], settings)
+        return {"ok": True}
+
+    # Create or update the row in a single upsert that returns the stored settings.
+    stmt = dialect_insert(models.UserSettings).values(user_id=user["sub"], **values)
+    settings = db.scalars(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={column: stmt.excluded[column] for column in values},
+        ).returning(models.UserSettings)
+    ).one()
     db.commit()
-    db.refresh(settings)
+    _remember_settings(user["sub"], settings)
     return {"ok": True}
 
 
 # Mount frontend static files AFTER all API routes are defined
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
-if os.path.isdir(frontend_path):
-    assets_dir = os.path.join(frontend_path, "assets")
-    expo_static_dir = os.path.join(frontend_path, "_expo", "static")
-    if os.path.isdir(assets_dir):
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
-    if os.path.isdir(expo_static_dir):
-        app.mount("/_expo/static", StaticFiles(directory=expo_static_dir), name="expo-static")
-
-    def _resolve_favicon(ext: str | None = None) -> str | None:
-        dist_root = os.path.realpath(frontend_path)
-        search_paths: list[str] = []
-        if ext:
-            search_paths.append(os.path.join(dist_root, f"favicon.{ext}"))
-            if ext != "ico":
-                search_paths.append(os.path.join(dist_root, "favicon.ico"))
-        else:
-            search_paths.append(os.path.join(dist_root, "favicon.ico"))
 
-        search_paths.append(os.path.join(dist_root, "assets", "images", "favicon.ico"))
-        search_paths.append(
-            os.path.join(
-                os.path.dirname(__file__), "..", "frontend", "assets", "images", "favicon.ico"
-            )
+
+def _scan_spa_build(root: str) -> tuple[dict[str, str], set[str]]:
+    # The build output does not change while the server runs, so list it once with
+    # scandir (whose entries carry their file type) instead of probing the filesystem
+    # for mounts and on every request. Returns relative posix paths mapped to resolved
+    # files, plus the directories. Files that resolve outside the build directory
+    # (e.g. symlinks) are left out, and symlinked directories are not descended into.
+    dist_root = os.path.realpath(root)
+    files: dict[str, str] = {}
+    directories: set[str] = set()
+    pending = [("", dist_root)]
+    while pending:
+        prefix, directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative = prefix + entry.name
+                if entry.is_dir():
+                    directories.add(relative)
+                    if not entry.is_symlink():
+                        pending.append((relative + "/", entry.path))
+                    continue
+                resolved = os.path.realpath(entry.path)
+                if os.path.commonpath([resolved, dist_root]) == dist_root:
+                    files[relative] = resolved
+    return files, directories
+
+
+try:
+    _spa_files, _spa_directories = _scan_spa_build(frontend_path)
+except (FileNotFoundError, NotADirectoryError):
+    _spa_files = None
+
+if _spa_files is not None:
+    if "assets" in _spa_directories:
+        app.mount(
+            "/assets",
+            StaticFiles(directory=os.path.join(frontend_path, "assets")),
+            name="assets",
+        )
+    if "_expo/static" in _spa_directories:
+        app.mount(
+            "/_expo/static",
+            StaticFiles(directory=os.path.join(frontend_path, "_expo", "static")),
+            name="expo-static",
         )
 
-        for candidate in search_paths:
-            if candidate and os.path.isfile(candidate):
-                return candidate
-        return None
+    @lru_cache(maxsize=256)
+    def _static_file_stat(file_path: str) -> os.stat_result:
+        return os.stat(file_path)
+
+    def _static_file_response(file_path: str) -> FileResponse:
+        # Build files are immutable while the server runs; reuse their stat results for
+        # Content-Length, Last-Modified and ETag instead of stat-ing on every request.
+        return FileResponse(file_path, stat_result=_static_file_stat(file_path))
+
+    _spa_index_html = os.path.join(frontend_path, "index.html")
+
+    _source_favicon = os.path.join(
+        os.path.dirname(__file__), "..", "frontend", "assets", "images", "favicon.ico"
+    )
+    # Served when the build has no favicon of the requested type.
+    _fallback_favicon = (
+        _spa_files.get("favicon.ico")
+        or _spa_files.get("assets/images/favicon.ico")
+        or (_source_favicon if os.path.isfile(_source_favicon) else None)
+    )
+
+    def _resolve_favicon(ext: str) -> str | None:
+        return _spa_files.get(f"favicon.{ext}") or _fallback_favicon
 
     @app.get("/favicon.{ext}")
     async def serve_favicon_with_ext(ext: str):
         favicon_path = _resolve_favicon(ext)
         if favicon_path:
-            return FileResponse(favicon_path)
+            return _static_file_response(favicon_path)
         raise HTTPException(status_code=404, detail="Favicon not found")
 
     @app.get("/favicon.ico")
     async def serve_favicon_ico():
         favicon_path = _resolve_favicon("ico")
         if favicon_path:
-            return FileResponse(favicon_path)
+            return _static_file_response(favicon_path)
         raise HTTPException(status_code=404, detail="Favicon not found")
 
     @app.get("/{path:path}")
@@ -1323,21 +1780,15 @@ if os.path.isdir(frontend_path):
         # Do not catch API paths
         if path.startswith("api/"):
             raise HTTPException(status_code=404, detail="Not Found")
-        # Serve static files in dist root if requested path exists (e.g., manifest)
-        dist_root = os.path.realpath(frontend_path)
-        direct_file = os.path.realpath(os.path.join(frontend_path, path))
-        if os.path.commonpath([direct_file, dist_root]) == dist_root and os.path.isfile(
-            direct_file
-        ):
-            return FileResponse(direct_file)
-
-        # Serve HTML for routes (path -> path.html)
-        html_file = os.path.realpath(os.path.join(frontend_path, f"{path}.html"))
-        if os.path.commonpath([html_file, dist_root]) == dist_root and os.path.isfile(html_file):
-            return FileResponse(html_file)
+        # Serve static files in dist root if requested path exists (e.g., manifest),
+        # then HTML for routes (path -> path.html)
+        path = path.strip("/")
+        file_path = _spa_files.get(path) or _spa_files.get(f"{path}.html")
+        if file_path:
+            return _static_file_response(file_path)
 
         # Fallback to index.html for SPA routing (client-side routing)
-        return FileResponse(os.path.join(frontend_path, "index.html"))
+        return _static_file_response(_spa_index_html)
 
 else:
     print("Frontend build not found at", frontend_path)
@@ -0,0 +1,56 @@
+from collections.abc import Iterable
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .responses import ORJSONResponse
+
+
+class LimitUploadSizeMiddleware:
+    """Reject request bodies above ``max_body_size`` on the given paths.
+
+    A declared ``Content-Length`` over the limit is answered with 413 before any of the
+    body is read. Otherwise the body stream is counted as it arrives and aborted with the
+    same 413 once the limit is crossed, so oversized uploads are never spooled in full.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = _content_length(scope)
+        if content_length is not None and content_length > self.max_body_size:
+            response = ORJSONResponse(status_code=413, content={"detail": "File too large"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised while the route parses the body, so the app's HTTPException
+                    # handler turns it into the response.
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _content_length(scope: Scope) -> int | None:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
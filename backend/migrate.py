@@ -0,0 +1,9 @@
+"""Create missing tables and apply pending migrations, then exit.
+
+Usage: ``python -m backend.migrate``
+"""
+
+from .main import _prepare_database
+
+if __name__ == "__main__":
+    _prepare_database()
@@ -1,8 +1,23 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    Float,
+    DateTime,
+    ForeignKey,
+    Text,
+    JSON,
+    Index,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
+# None is stored as SQL NULL rather than the JSON literal ``null``. JSON values are
+# always replaced wholesale, never mutated in place, so no mutation tracking is needed.
+NullableJSON = JSON(none_as_null=True)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -15,21 +30,29 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Settings stored as JSON for frontend flexibility
-    settings = Column(JSON, nullable=True)  # theme, timezone, reward_units, etc.
+    settings = Column(NullableJSON, nullable=True)  # theme, timezone, reward_units, etc.
 
-    habits = relationship("Habit", back_populates="user", cascade="all, delete-orphan")
-    checks = relationship("Check", back_populates="user", cascade="all, delete-orphan")
-    counts = relationship("Count", back_populates="user", cascade="all, delete-orphan")
+    habits = relationship(
+        "Habit", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    checks = relationship(
+        "Check", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    counts = relationship(
+        "Count", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
     weight_updates = relationship(
-        "WeightUpdate", back_populates="user", cascade="all, delete-orphan"
+        "WeightUpdate", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    active_days = relationship(
+        "ActiveDay", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
-    active_days = relationship("ActiveDay", back_populates="user", cascade="all, delete-orphan")
 
 
 class Habit(Base):
     __tablename__ = "habits"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
 
@@ -38,19 +61,21 @@ class Habit(Base):
     is_weight = Column(Boolean, default=False)
 
     # Count-specific settings (stored as JSON for frontend flexibility)
-    count_settings = Column(JSON, nullable=True)  # target, unit, step_size, count_is_good, etc.
+    # target, unit, step_size, count_is_good, etc.
+    count_settings = Column(NullableJSON, nullable=True)
 
     # Weight-specific settings
-    weight_settings = Column(JSON, nullable=True)  # target_weight, unit, etc.
+    weight_settings = Column(NullableJSON, nullable=True)  # target_weight, unit, etc.
 
     # Scheduling settings (all handled by frontend)
-    schedule_settings = Column(JSON, nullable=True)  # weekdays, interval, display_rules, etc.
+    # weekdays, interval, display_rules, etc.
+    schedule_settings = Column(NullableJSON, nullable=True)
 
     # Reward settings
-    reward_settings = Column(JSON, nullable=True)  # success_points, penalty_points, etc.
+    reward_settings = Column(NullableJSON, nullable=True)  # success_points, penalty_points, etc.
 
     # Display settings
-    display_settings = Column(JSON, nullable=True)  # order, hidden, color, etc.
+    display_settings = Column(NullableJSON, nullable=True)  # order, hidden, color, etc.
 
     # Soft deletion
     deleted_at = Column(DateTime(timezone=True), nullable=True)
@@ -58,14 +83,21 @@ class Habit(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="habits")
+    # List endpoints filter by owner and soft deletion
+    __table_args__ = (Index("ix_habits_user_deleted", "user_id", "deleted_at"),)
+
+    user = relationship("User", back_populates="habits", lazy="raise_on_sql")
     sub_habits = relationship(
-        "SubHabit", back_populates="parent_habit", cascade="all, delete-orphan"
+        "SubHabit", back_populates="parent_habit", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    checks = relationship(
+        "Check", back_populates="habit", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    counts = relationship(
+        "Count", back_populates="habit", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
-    checks = relationship("Check", back_populates="habit", cascade="all, delete-orphan")
-    counts = relationship("Count", back_populates="habit", cascade="all, delete-orphan")
     weight_updates = relationship(
-        "WeightUpdate", back_populates="habit", cascade="all, delete-orphan"
+        "WeightUpdate", back_populates="habit", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
 
 
@@ -79,19 +111,21 @@ class SubHabit(Base):
     order_index = Column(Integer, default=0)
 
     # Reward settings for individual sub-habits
-    reward_settings = Column(JSON, nullable=True)
+    reward_settings = Column(NullableJSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    parent_habit = relationship("Habit", back_populates="sub_habits")
-    checks = relationship("Check", back_populates="sub_habit", cascade="all, delete-orphan")
+    parent_habit = relationship("Habit", back_populates="sub_habits", lazy="raise_on_sql")
+    checks = relationship(
+        "Check", back_populates="sub_habit", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
 
 
 class Check(Base):
     __tablename__ = "checks"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     habit_id = Column(Integer, ForeignKey("habits.id"), nullable=True, index=True)
     sub_habit_id = Column(Integer, ForeignKey("sub_habits.id"), nullable=True, index=True)
 
@@ -99,69 +133,81 @@ class Check(Base):
     check_date = Column(DateTime(timezone=True), nullable=False)
 
     # Store any metadata for frontend use
-    metadata_json = Column(JSON, nullable=True)
+    metadata_json = Column(NullableJSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="checks")
-    habit = relationship("Habit", back_populates="checks")
-    sub_habit = relationship("SubHabit", back_populates="checks")
+    # List endpoints filter by owner (and habit) and page through dates
+    __table_args__ = (
+        Index("ix_checks_user_date", "user_id", "check_date"),
+        Index("ix_checks_user_habit_date", "user_id", "habit_id", "check_date"),
+    )
+
+    user = relationship("User", back_populates="checks", lazy="raise_on_sql")
+    habit = relationship("Habit", back_populates="checks", lazy="raise_on_sql")
+    sub_habit = relationship("SubHabit", back_populates="checks", lazy="raise_on_sql")
 
 
 class Count(Base):
     __tablename__ = "counts"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False, index=True)
 
     value = Column(Float, nullable=False)
     count_date = Column(DateTime(timezone=True), nullable=False)
 
     # Store any metadata for frontend use
-    metadata_json = Column(JSON, nullable=True)
+    metadata_json = Column(NullableJSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="counts")
-    habit = relationship("Habit", back_populates="counts")
+    __table_args__ = (Index("ix_counts_user_habit_date", "user_id", "habit_id", "count_date"),)
+
+    user = relationship("User", back_populates="counts", lazy="raise_on_sql")
+    habit = relationship("Habit", back_populates="counts", lazy="raise_on_sql")
 
 
 class WeightUpdate(Base):
     __tablename__ = "weight_updates"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False, index=True)
 
     weight = Column(Float, nullable=False)
     update_date = Column(DateTime(timezone=True), nullable=False)
 
     # Store any metadata for frontend use
-    metadata_json = Column(JSON, nullable=True)
+    metadata_json = Column(NullableJSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="weight_updates")
-    habit = relationship("Habit", back_populates="weight_updates")
+    __table_args__ = (Index("ix_weights_user_date", "user_id", "update_date"),)
+
+    user = relationship("User", back_populates="weight_updates", lazy="raise_on_sql")
+    habit = relationship("Habit", back_populates="weight_updates", lazy="raise_on_sql")
 
 
 class ActiveDay(Base):
     __tablename__ = "active_days"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
 
     date = Column(DateTime(timezone=True), nullable=False)
     validated = Column(Boolean, default=False)
 
     # Store day summary data for frontend use
-    summary_data = Column(JSON, nullable=True)
+    summary_data = Column(NullableJSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="active_days")
+    __table_args__ = (Index("ix_active_days_user_date", "user_id", "date"),)
+
+    user = relationship("User", back_populates="active_days", lazy="raise_on_sql")
 
 
 # Legacy models (keep for backwards compatibility)
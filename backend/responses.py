@@ -0,0 +1,15 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Use it on routes that return plain dicts. Routes with a ``response_model`` already
+    serialize through pydantic and should keep the default response class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
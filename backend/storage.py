@@ -1,9 +1,20 @@
 import os
 from dataclasses import dataclass
+from io import BytesIO
 from urllib.parse import quote
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# Payloads below this size go up in a single PutObject; larger ones use multipart.
+SINGLE_PUT_MAX_BYTES = 8 * 1024 * 1024
+MULTIPART_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=SINGLE_PUT_MAX_BYTES,
+    max_concurrency=4,
+    use_threads=True,
+)
 
 
 @dataclass(frozen=True)
@@ -43,6 +54,15 @@ class ObjectStorageConfig:
         )
 
 
+def _object_headers(content_type: str | None, cache_control: str | None) -> dict:
+    headers = {}
+    if content_type:
+        headers["ContentType"] = content_type
+    if cache_control:
+        headers["CacheControl"] = cache_control
+    return headers
+
+
 class ObjectStorage:
     def __init__(self, config: ObjectStorageConfig, client=None):
         self.config = config
@@ -69,10 +89,49 @@ class ObjectStorage:
     def bucket_name(self) -> str:
         return self.config.bucket_name
 
-    def upload_fileobj(self, fileobj, key: str, content_type: str | None = None) -> None:
-        extra_args = {"ContentType": content_type} if content_type else None
+    def upload_fileobj(
+        self,
+        fileobj,
+        key: str,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
+        extra_args = _object_headers(content_type, cache_control)
         kwargs = {"ExtraArgs": extra_args} if extra_args else {}
-        self.client.upload_fileobj(fileobj, self.bucket_name, key, **kwargs)
+        self.client.upload_fileobj(
+            fileobj, self.bucket_name, key, Config=MULTIPART_TRANSFER_CONFIG, **kwargs
+        )
+
+    def upload_bytes(
+        self,
+        data: bytes,
+        key: str,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
+        if len(data) >= SINGLE_PUT_MAX_BYTES:
+            self.upload_fileobj(
+                BytesIO(data), key, content_type=content_type, cache_control=cache_control
+            )
+            return
+
+        kwargs = _object_headers(content_type, cache_control)
+        self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=data,
+            ContentLength=len(data),
+            **kwargs,
+        )
+
+    def object_exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return False
+            raise
+        return True
 
     def presigned_get_url(self, key: str, expires_in: int = 3600) -> str:
         return self.client.generate_presigned_url(
@@ -1,6 +1,7 @@
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from PIL import Image
+from PIL import Image, features
 import os
 
 # Comprehensive icon sizes for modern web and mobile apps
@@ -47,7 +48,47 @@ ICON_SIZES = {
 }
 
 
-def create_favicon_ico(src_img, output_path, sizes):
+def build_pyramid(src_img, smallest=16):
+    """Halve the source repeatedly so each icon resamples from a nearby level"""
+    pyramid = [src_img]
+    while min(pyramid[-1].size) // 2 >= smallest:
+        level = pyramid[-1]
+        pyramid.append(
+            level.resize((level.width // 2, level.height // 2), Image.Resampling.LANCZOS)
+        )
+    return pyramid
+
+
+def resize_from_pyramid(pyramid, width, height):
+    """Resize from the smallest pyramid level that is still at least the target size"""
+    base = pyramid[0]
+    for level in pyramid[1:]:
+        if level.width < width or level.height < height:
+            break
+        base = level
+    return base.resize((width, height), Image.Resampling.LANCZOS)
+
+
+# Sources at or above this size (icon.png, splash, ...) are kept at full colour depth
+FULL_COLOR_MIN_SIZE = 1024
+
+# libimagequant gives the best palettes but is an optional Pillow build feature;
+# fast octree is the fallback that still supports an alpha channel
+PALETTE_METHOD = (
+    Image.Quantize.LIBIMAGEQUANT if features.check("libimagequant") else Image.Quantize.FASTOCTREE
+)
+
+
+def to_palette(img, width, height):
+    """Reduce small icons to a 256-colour adaptive palette, which shrinks their PNGs"""
+    if max(width, height) >= FULL_COLOR_MIN_SIZE:
+        return img
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    return img.quantize(colors=256, method=PALETTE_METHOD)
+
+
+def create_favicon_ico(pyramid, output_path, sizes):
     """Create a multi-size ICO file"""
     icons = []
     for size in sizes:
@@ -55,13 +96,43 @@ def create_favicon_ico(src_img, output_path, sizes):
             width, height = size
         else:
             width = height = size
-        icon = src_img.resize((width, height), Image.Resampling.LANCZOS)
+        icon = resize_from_pyramid(pyramid, width, height)
         icons.append(icon)
 
     # Save as ICO with multiple sizes
     icons[0].save(output_path, format="ICO", sizes=[(icon.width, icon.height) for icon in icons])
 
 
+_worker_pyramid = None
+
+
+def _init_worker(pyramid):
+    global _worker_pyramid
+    _worker_pyramid = pyramid
+
+
+def make_icon(job):
+    """Write one icon from the worker's pyramid, returning (name, description, error)"""
+    name, size_spec, output_path = job
+    try:
+        if name == "favicon.ico":
+            # Special handling for ICO files
+            create_favicon_ico(_worker_pyramid, output_path, size_spec)
+            return name, "multi-size ICO", None
+
+        if isinstance(size_spec, tuple):
+            # Non-square dimensions
+            width, height = size_spec
+        else:
+            # Square dimensions
+            width = height = size_spec
+        img = resize_from_pyramid(_worker_pyramid, width, height)
+        to_palette(img, width, height).save(output_path, optimize=True)
+        return name, f"{width}x{height}", None
+    except Exception as e:
+        return name, None, str(e)
+
+
 def main(src_path: str):
     try:
         src = Image.open(src_path)
@@ -81,33 +152,23 @@ def main(src_path: str):
         out_dir.mkdir(parents=True, exist_ok=True)
         print(f"✓ Output directory: {out_dir}")
 
-        icons_created = 0
+        pyramid = build_pyramid(src)
+        jobs = [(name, size_spec, out_dir / name) for name, size_spec in ICON_SIZES.items()]
 
-        for name, size_spec in ICON_SIZES.items():
-            output_path = out_dir / name
-
-            try:
-                if name == "favicon.ico":
-                    # Special handling for ICO files
-                    create_favicon_ico(src, output_path, size_spec)
-                    print(f"✓ Created {name} (multi-size ICO)")
-                elif isinstance(size_spec, tuple):
-                    # Non-square dimensions
-                    width, height = size_spec
-                    img = src.resize((width, height), Image.Resampling.LANCZOS)
-                    img.save(output_path, optimize=True)
-                    print(f"✓ Created {name} ({width}x{height})")
-                else:
-                    # Square dimensions
-                    size = size_spec
-                    img = src.resize((size, size), Image.Resampling.LANCZOS)
-                    img.save(output_path, optimize=True)
-                    print(f"✓ Created {name} ({size}x{size})")
+        # Icons are independent, so resample them across cores; each worker receives
+        # the pyramid once instead of once per icon
+        with ProcessPoolExecutor(
+            max_workers=os.cpu_count(), initializer=_init_worker, initargs=(pyramid,)
+        ) as executor:
+            results = list(executor.map(make_icon, jobs))
 
+        icons_created = 0
+        for name, description, error in results:
+            if error is None:
+                print(f"✓ Created {name} ({description})")
                 icons_created += 1
-
-            except Exception as e:
-                print(f"✗ Failed to create {name}: {e}")
+            else:
+                print(f"✗ Failed to create {name}: {error}")
 
         print(f"\n🎉 Successfully created {icons_created}/{len(ICON_SIZES)} icons!")
 
@@ -102,9 +102,14 @@ if [ "$FRONTEND_ONLY" = false ]; then
         pip install -r requirements.txt
     fi
 
+    # Skip entry-point scanning for every installed pytest plugin; the ones the suite
+    # needs are loaded explicitly with -p below
+    export PYTEST_DISABLE_PLUGIN_AUTOLOAD=1
+    PYTEST_PLUGINS="-p pytest_asyncio.plugin"
+
     if [ "$COVERAGE" = true ]; then
         print_status "Running backend tests with coverage..."
-        if pytest tests/ --cov=backend --cov-report=html --cov-report=term --cov-fail-under=60; then
+        if pytest tests/ $PYTEST_PLUGINS -p pytest_cov.plugin --cov=backend --cov-report=html --cov-report=term --cov-fail-under=60; then
             BACKEND_SUCCESS=true
             print_success "Backend tests passed with coverage!"
             print_status "Backend coverage report generated in htmlcov/"
@@ -117,7 +122,11 @@ if [ "$FRONTEND_ONLY" = false ]; then
         if [ "$SUMMARY_ONLY" = true ]; then
             PYTEST_ARGS="-q"
         fi
-        if pytest tests/ $PYTEST_ARGS; then
+        # Spread test modules across cores; loadscope keeps each module's fixtures on one worker
+        if python -c "import xdist" >/dev/null 2>&1; then
+            PYTEST_ARGS="$PYTEST_ARGS -p xdist.plugin -n auto --dist=loadscope"
+        fi
+        if pytest tests/ $PYTEST_PLUGINS $PYTEST_ARGS; then
             BACKEND_SUCCESS=true
             print_success "Backend tests passed!"
         else
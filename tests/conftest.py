@@ -0,0 +1,129 @@
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import backend.auth as auth_module
+import backend.main as main_module
+from backend import models
+
+
+def _clear_process_caches():
+    auth_module._verified_tokens.clear()
+    auth_module._clear_jwks_cache()
+    main_module._userinfo_cache.clear()
+    main_module._nugget_cache.clear()
+    main_module._settings_cache.clear()
+
+
+def clear_tables(engine):
+    """Delete every row, children first, leaving the schema in place."""
+    with engine.begin() as connection:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture(autouse=True)
+def reset_backend_caches():
+    """Process-local caches must not leak state between tests."""
+    _clear_process_caches()
+    yield
+    _clear_process_caches()
+
+
+@pytest.fixture
+def jwt_user(monkeypatch):
+    """Return an installer that makes every bearer token verify to the given payload.
+
+    Signature checks and the JWKS lookup are bypassed until the test ends.
+    """
+
+    def install(payload):
+        monkeypatch.setattr(auth_module, "_get_rsa_key", lambda token: {})
+        monkeypatch.setattr(auth_module.jwt, "decode", lambda *args, **kwargs: payload)
+
+    return install
+
+
+AUTH0_TEST_USERINFO_URL = "https://test-domain.auth0.com/userinfo"
+
+
+@pytest.fixture
+def mock_auth0_userinfo(monkeypatch):
+    """Point Auth0 userinfo at a test URL and return an installer for httpx handlers.
+
+    Calling the installer with a handler makes it the app's shared HTTP client and returns
+    that client, for tests that pass it to fetch_auth0_userinfo directly.
+    """
+    monkeypatch.setattr(main_module, "AUTH0_USERINFO_URL", AUTH0_TEST_USERINFO_URL)
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(main_module.app.state, "http_client", client, raising=False)
+        return client
+
+    return install
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient():
+    """One async client for the run that dispatches straight into the ASGI app.
+
+    Unlike TestClient there is no portal thread per request. Dependency overrides are
+    whatever the requesting module has installed.
+    """
+    transport = httpx.ASGITransport(app=main_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def assert_json_contains():
+    """Return a checker that parses a response body once and asserts the given fields.
+
+    The parsed body is returned for any further assertions.
+    """
+    import orjson
+
+    def check(response, **fields):
+        body = orjson.loads(response.content)
+        for key, expected in fields.items():
+            assert body.get(key) == expected, key
+        return body
+
+    return check
+
+
+@pytest.fixture(scope="session")
+def index_html_bytes():
+    """The built SPA's index.html, read from disk once per run."""
+    with open(os.path.join(main_module.frontend_path, "index.html"), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def expo_js_files():
+    """File names in the build's Expo web JS bundle directory, listed once per run."""
+    return os.listdir(os.path.join(main_module.frontend_path, "_expo", "static", "js", "web"))
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    """One in-memory database for the whole run; the schema is created once."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def TestingSessionLocal(test_engine):
+    """Sessions on the shared engine, with all rows removed after each test."""
+    yield sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    clear_tables(test_engine)
@@ -10,9 +10,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 os.environ.setdefault("OPENAI_API_KEY", "test")
 
 import pytest
+from unittest.mock import patch
 from PIL import Image
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from backend import models
@@ -25,16 +26,13 @@ def image_bytes(image_format: str) -> bytes:
     return output.getvalue()
 
 
-@pytest.fixture
-def client(tmp_path, monkeypatch):
-    """Create test client with isolated database"""
-    db_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    models.Base.metadata.create_all(bind=engine)
+@pytest.fixture(scope="module")
+def app_client(test_engine):
+    """One test client, storage stub and set of overrides for the whole module"""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
     def override_get_db():
-        db = TestingSessionLocal()
+        db = SessionLocal()
         try:
             yield db
         finally:
@@ -43,14 +41,18 @@ def client(tmp_path, monkeypatch):
     def mock_auth():
         return {"sub": "test_user"}
 
+    saved_overrides = dict(app.dependency_overrides)
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[verify_jwt] = mock_auth
 
     uploads = {}
 
     class DummyStorage:
-        def upload_fileobj(self, fileobj, key, content_type=None):
-            uploads[key] = fileobj.read()
+        def object_exists(self, key):
+            return key in uploads
+
+        def upload_bytes(self, data, key, content_type=None, cache_control=None):
+            uploads[key] = data
 
         def public_object_url(self, key, request_base_url):
             return f"{request_base_url.rstrip('/')}/api/profile-picture/{key}"
@@ -58,11 +60,22 @@ def client(tmp_path, monkeypatch):
         def presigned_get_url(self, key, expires_in=3600):
             return f"https://storage.example/{key}?signed=1"
 
-    monkeypatch.setattr("backend.main.profile_picture_storage", DummyStorage())
-
-    client = TestClient(app)
-    yield client, uploads
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("backend.main.profile_picture_storage", DummyStorage())
+        yield TestClient(app), uploads
     app.dependency_overrides.clear()
+    app.dependency_overrides.update(saved_overrides)
+
+
+@pytest.fixture
+def client(app_client, TestingSessionLocal):
+    """The shared client, with uploads, rows and any per-test overrides reset afterwards"""
+    saved_overrides = dict(app.dependency_overrides)
+    yield app_client
+    if app.dependency_overrides != saved_overrides:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved_overrides)
+    app_client[1].clear()
 
 
 class TestUserSettings:
@@ -81,8 +94,6 @@ class TestUserSettings:
 
     def test_create_settings_recovers_from_concurrent_insert(self, tmp_path, monkeypatch):
         """Settings creation should tolerate first-load request races."""
-        from sqlalchemy.exc import IntegrityError
-
         from backend.main import _get_or_create_user_settings
 
         db_path = tmp_path / "settings_race.db"
@@ -92,24 +103,20 @@ class TestUserSettings:
 
         db = TestingSessionLocal()
         session_cls = type(db)
-        original_commit = session_cls.commit
-        raised = {"done": False}
+        original_scalars = session_cls.scalars
 
-        def racing_commit(session):
-            if session is db and not raised["done"]:
-                raised["done"] = True
+        def racing_scalars(session, statement, *args, **kwargs):
+            # Another request creates the row between our lookup and our insert
+            if session is db and statement.is_insert:
                 competing_db = TestingSessionLocal()
                 try:
                     competing_db.add(models.UserSettings(user_id="race_user", name="Race Winner"))
-                    original_commit(competing_db)
+                    competing_db.commit()
                 finally:
                     competing_db.close()
-                raise IntegrityError(
-                    "INSERT INTO user_settings", {}, Exception("duplicate user_id")
-                )
-            return original_commit(session)
+            return original_scalars(session, statement, *args, **kwargs)
 
-        monkeypatch.setattr(session_cls, "commit", racing_commit)
+        monkeypatch.setattr(session_cls, "scalars", racing_scalars)
 
         try:
             settings = _get_or_create_user_settings(db, "race_user")
@@ -118,7 +125,7 @@ class TestUserSettings:
         finally:
             db.close()
 
-    def test_update_all_settings(self, client):
+    def test_update_all_settings(self, client, TestingSessionLocal):
         """Test updating all user settings"""
         c, _ = client
         settings_data = {
@@ -132,16 +139,15 @@ class TestUserSettings:
         assert response.status_code == 200
         assert response.json() == {"ok": True}
 
-        # Verify settings were saved
-        response = c.get("/api/settings")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["name"] == "John Doe"
-        assert data["nickname"] == "johnny"
-        assert data["email"] == "john@example.com"
-        assert data["imageUrl"] == "https://example.com/pic.jpg"
+        # Verify settings were saved; the GET read path is covered by test_main
+        with TestingSessionLocal() as db:
+            saved = db.get(models.UserSettings, "test_user")
+            assert saved.name == "John Doe"
+            assert saved.nickname == "johnny"
+            assert saved.email == "john@example.com"
+            assert saved.image_url == "https://example.com/pic.jpg"
 
-    def test_partial_settings_update(self, client):
+    def test_partial_settings_update(self, client, TestingSessionLocal):
         """Test updating only some settings"""
         c, _ = client
 
@@ -153,10 +159,46 @@ class TestUserSettings:
         assert response.status_code == 200
 
         # Verify only name was updated
-        response = c.get("/api/settings")
-        data = response.json()
-        assert data["name"] == "Updated Name"
-        assert data["email"] == "initial@test.com"
+        with TestingSessionLocal() as db:
+            saved = db.get(models.UserSettings, "test_user")
+            assert saved.name == "Updated Name"
+            assert saved.email == "initial@test.com"
+
+    def test_writes_fall_back_to_orm_without_dialect_upserts(
+        self, client, TestingSessionLocal, monkeypatch
+    ):
+        """Databases without ON CONFLICT inserts still create users and settings"""
+        from backend.main import _insert_user_from_claims
+
+        monkeypatch.setattr("backend.main._DIALECT_INSERTS", {})
+        c, _ = client
+
+        assert c.get("/api/users/me").json()["id"] == "test_user"
+        assert c.get("/api/settings").json()["name"] == ""
+        assert c.post("/api/settings", json={"name": "Fallback"}).json() == {"ok": True}
+
+        with TestingSessionLocal() as db:
+            assert db.get(models.UserSettings, "test_user").name == "Fallback"
+            # A concurrent first login that lost the race reports the conflict as None
+            claims = {"sub": "test_user"}
+            assert _insert_user_from_claims(db, claims, "other@example.com") is None
+
+    def test_empty_settings_update_skips_database(self, client, test_engine):
+        """Posting no fields is a no-op that does not touch the database"""
+        c, _ = client
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            response = c.post("/api/settings", json={})
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert statements == []
 
 
 class TestFileUpload:
@@ -239,6 +281,26 @@ class TestNuggetAPI:
         response = c.get("/api/nugget")
         assert response.json() == {"text": "second nugget"}
 
+    def test_cached_nugget_skips_database(self, client, monkeypatch):
+        """Repeated reads are served from the process-local nugget cache"""
+        c, _ = client
+        monkeypatch.setattr("backend.main.generate_nugget", lambda: "cached nugget")
+        assert c.get("/api/nugget").json() == {"text": "cached nugget"}
+
+        with patch("sqlalchemy.orm.Session.query", side_effect=AssertionError("not cached")):
+            response = c.get("/api/nugget")
+        assert response.json() == {"text": "cached nugget"}
+
+    def test_unchanged_regeneration_skips_database_write(self, client, monkeypatch):
+        """Regenerating the nugget that is already cached does not rewrite it"""
+        c, _ = client
+        monkeypatch.setattr("backend.main.generate_nugget", lambda: "same nugget")
+        c.get("/api/nugget")
+
+        with patch("sqlalchemy.orm.Session.commit", side_effect=AssertionError("rewritten")):
+            response = c.post("/api/nugget/regenerate")
+        assert response.json() == {"text": "same nugget"}
+
 
 class TestErrorHandling:
     """Test error handling and edge cases"""
@@ -262,8 +324,24 @@ class TestErrorHandling:
             "/api/upload-profile-picture",
             files={"file": ("large.png", io.BytesIO(large_data), "image/png")},
         )
-        # Should either succeed or fail gracefully
-        assert response.status_code in [200, 413, 422]
+        assert response.status_code == 413
+        assert response.json() == {"detail": "File too large"}
+
+    def test_oversized_upload_is_aborted_mid_stream(self, client):
+        """Bodies without a Content-Length are cut off once they cross the limit"""
+        c, uploads = client
+
+        def body():
+            for _ in range(8):
+                yield b"x" * (1024 * 1024)
+
+        response = c.post(
+            "/api/upload-profile-picture",
+            content=body(),
+            headers={"Content-Type": "multipart/form-data; boundary=limit"},
+        )
+        assert response.status_code == 413
+        assert not uploads
 
 
 class TestDatabaseIntegrity:
@@ -7,10 +7,8 @@ os.environ.setdefault("OPENAI_API_KEY", "test")
 import pytest
 from PIL import Image
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from backend import models
 from backend.main import app, get_db, verify_jwt, generate_nugget
 
 
@@ -20,28 +18,30 @@ def image_bytes(image_format: str) -> bytes:
     return output.getvalue()
 
 
-@pytest.fixture
-def client(tmp_path, monkeypatch):
-    db_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    models.Base.metadata.create_all(bind=engine)
+@pytest.fixture(scope="module")
+def app_client(test_engine):
+    """One test client, storage stub and set of overrides for the whole module"""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
     def override_get_db():
-        db = TestingSessionLocal()
+        db = SessionLocal()
         try:
             yield db
         finally:
             db.close()
 
+    saved_overrides = dict(app.dependency_overrides)
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[verify_jwt] = lambda: {"sub": "user"}
 
     uploads = {}
 
     class DummyStorage:
-        def upload_fileobj(self, fileobj, key, content_type=None):
-            uploads[key] = fileobj.read()
+        def object_exists(self, key):
+            return key in uploads
+
+        def upload_bytes(self, data, key, content_type=None, cache_control=None):
+            uploads[key] = data
 
         def public_object_url(self, key, request_base_url):
             return f"{request_base_url.rstrip('/')}/api/profile-picture/{key}"
@@ -49,11 +49,22 @@ def client(tmp_path, monkeypatch):
         def presigned_get_url(self, key, expires_in=3600):
             return f"https://storage.example/{key}?signed=1"
 
-    monkeypatch.setattr("backend.main.profile_picture_storage", DummyStorage())
-
-    client = TestClient(app)
-    yield client, uploads
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("backend.main.profile_picture_storage", DummyStorage())
+        yield TestClient(app), uploads
     app.dependency_overrides.clear()
+    app.dependency_overrides.update(saved_overrides)
+
+
+@pytest.fixture
+def client(app_client, TestingSessionLocal):
+    """The shared client, with uploads, rows and any per-test overrides reset afterwards"""
+    saved_overrides = dict(app.dependency_overrides)
+    yield app_client
+    if app.dependency_overrides != saved_overrides:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved_overrides)
+    app_client[1].clear()
 
 
 def test_nugget_generation_and_regeneration(client, monkeypatch):
@@ -105,3 +116,13 @@ def test_upload_profile_picture(client):
     url = resp.json()["url"]
     assert url.startswith("http://testserver/api/profile-picture/profile_pics/")
     assert uploads
+
+
+def test_upload_profile_picture_reuses_identical_content(client):
+    c, uploads = client
+    image = image_bytes("PNG")
+    first = c.post("/api/upload-profile-picture", files={"file": ("a.png", image, "image/png")})
+    second = c.post("/api/upload-profile-picture", files={"file": ("b.png", image, "image/png")})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["url"] == second.json()["url"]
+    assert list(uploads.values()) == [image]
@@ -2,12 +2,62 @@
 Tests for authentication functions
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
 import pytest
-from unittest.mock import patch, Mock
+import requests
+from unittest.mock import DEFAULT, call, patch, Mock
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 
-from backend.auth import verify_jwt, _get_jwks, _get_rsa_key
+from backend.auth import JWKSUnavailable, verify_jwt, _get_jwks, _get_rsa_key
+
+
+def _rsa_jwk(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return private_key, {**jwk, "kid": kid, "use": "sig"}
+
+
+SIGNING_KEY, SIGNING_JWK = _rsa_jwk("test-key-id")
+ROTATED_KEY, ROTATED_JWK = _rsa_jwk("new-key-id")
+
+JWKS_ONE_KEY = {"keys": [{"kid": "test-key"}]}
+JWKS_SIGNING = {"keys": [SIGNING_JWK]}
+JWKS_OTHER_KEY = {
+    "keys": [{"kid": "different-key-id", "kty": "RSA", "use": "sig", "n": "test-n", "e": "test-e"}]
+}
+
+
+def _jwks_response(payload):
+    """A successful requests response whose JSON body is ``payload``"""
+    response = Mock()
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+@pytest.fixture
+def rsa_key_mocks():
+    """Mocks for the JWKS lookup and token header parsing behind _get_rsa_key"""
+    with (
+        patch.multiple("backend.auth", _get_jwks=DEFAULT) as auth_mocks,
+        patch.multiple("backend.auth.jwt", get_unverified_header=DEFAULT) as jwt_mocks,
+    ):
+        yield {**auth_mocks, **jwt_mocks}
+
+
+@pytest.fixture
+def decode_mocks():
+    """Mocks for the signing key lookup and token decoding behind verify_jwt"""
+    with (
+        patch.multiple("backend.auth", _get_rsa_key=DEFAULT) as auth_mocks,
+        patch.multiple("backend.auth.jwt", decode=DEFAULT) as jwt_mocks,
+    ):
+        yield {**auth_mocks, **jwt_mocks}
 
 
 class TestAuth:
@@ -16,16 +66,10 @@ class TestAuth:
     @patch("backend.auth.requests.get")
     def test_get_jwks_success(self, mock_get):
         """Test successful JWKS retrieval"""
-        mock_response = Mock()
-        mock_response.json.return_value = {"keys": [{"kid": "test-key"}]}
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
-
-        # Clear the cache first
-        _get_jwks.cache_clear()
+        mock_get.return_value = _jwks_response(JWKS_ONE_KEY)
 
         result = _get_jwks()
-        assert result == {"keys": [{"kid": "test-key"}]}
+        assert result == JWKS_ONE_KEY
         assert mock_get.call_args.kwargs["timeout"] == 5
 
     @patch("backend.auth.requests.get")
@@ -35,55 +79,25 @@ class TestAuth:
         mock_response.raise_for_status.side_effect = Exception("HTTP Error")
         mock_get.return_value = mock_response
 
-        # Clear the cache first
-        _get_jwks.cache_clear()
-
         with pytest.raises(Exception):
             _get_jwks()
 
-    @patch("backend.auth._get_jwks")
-    @patch("backend.auth.jwt.get_unverified_header")
-    def test_get_rsa_key_success(self, mock_get_header, mock_get_jwks):
+    def test_get_rsa_key_success(self, rsa_key_mocks):
         """Test successful RSA key retrieval"""
+        mock_get_header = rsa_key_mocks["get_unverified_header"]
+        mock_get_jwks = rsa_key_mocks["_get_jwks"]
         mock_get_header.return_value = {"kid": "test-key-id"}
-        mock_get_jwks.return_value = {
-            "keys": [
-                {
-                    "kid": "test-key-id",
-                    "kty": "RSA",
-                    "use": "sig",
-                    "n": "test-n",
-                    "e": "test-e",
-                }
-            ]
-        }
+        mock_get_jwks.return_value = JWKS_SIGNING
 
         result = _get_rsa_key("test-token")
-        expected = {
-            "kty": "RSA",
-            "kid": "test-key-id",
-            "use": "sig",
-            "n": "test-n",
-            "e": "test-e",
-        }
-        assert result == expected
+        assert result.public_numbers() == SIGNING_KEY.public_key().public_numbers()
 
-    @patch("backend.auth._get_jwks")
-    @patch("backend.auth.jwt.get_unverified_header")
-    def test_get_rsa_key_not_found(self, mock_get_header, mock_get_jwks):
+    def test_get_rsa_key_not_found(self, rsa_key_mocks):
         """Test RSA key not found"""
+        mock_get_header = rsa_key_mocks["get_unverified_header"]
+        mock_get_jwks = rsa_key_mocks["_get_jwks"]
         mock_get_header.return_value = {"kid": "missing-key-id"}
-        mock_get_jwks.return_value = {
-            "keys": [
-                {
-                    "kid": "different-key-id",
-                    "kty": "RSA",
-                    "use": "sig",
-                    "n": "test-n",
-                    "e": "test-e",
-                }
-            ]
-        }
+        mock_get_jwks.return_value = JWKS_OTHER_KEY
 
         with pytest.raises(HTTPException) as exc_info:
             _get_rsa_key("test-token")
@@ -91,52 +105,22 @@ class TestAuth:
         assert exc_info.value.status_code == 401
         assert exc_info.value.detail == "Invalid authorization header"
 
-    @patch("backend.auth._get_jwks")
-    @patch("backend.auth.jwt.get_unverified_header")
-    def test_get_rsa_key_refreshes_jwks_on_kid_miss(self, mock_get_header, mock_get_jwks):
+    def test_get_rsa_key_refreshes_jwks_on_kid_miss(self, rsa_key_mocks):
         """Refresh JWKS cache once when Auth0 rotates signing keys"""
+        mock_get_header = rsa_key_mocks["get_unverified_header"]
+        mock_get_jwks = rsa_key_mocks["_get_jwks"]
         mock_get_header.return_value = {"kid": "new-key-id"}
-        mock_get_jwks.side_effect = [
-            {
-                "keys": [
-                    {
-                        "kid": "old-key-id",
-                        "kty": "RSA",
-                        "use": "sig",
-                        "n": "old-n",
-                        "e": "old-e",
-                    }
-                ]
-            },
-            {
-                "keys": [
-                    {
-                        "kid": "new-key-id",
-                        "kty": "RSA",
-                        "use": "sig",
-                        "n": "new-n",
-                        "e": "new-e",
-                    }
-                ]
-            },
-        ]
+        mock_get_jwks.side_effect = [JWKS_SIGNING, {"keys": [ROTATED_JWK]}]
 
         result = _get_rsa_key("test-token")
 
-        assert result == {
-            "kty": "RSA",
-            "kid": "new-key-id",
-            "use": "sig",
-            "n": "new-n",
-            "e": "new-e",
-        }
-        assert mock_get_jwks.call_count == 2
-        mock_get_jwks.cache_clear.assert_called_once()
+        assert result.public_numbers() == ROTATED_KEY.public_key().public_numbers()
+        assert mock_get_jwks.call_args_list == [call(), call(force_refresh=True)]
 
-    @patch("backend.auth._get_rsa_key")
-    @patch("backend.auth.jwt.decode")
-    def test_verify_jwt_success(self, mock_jwt_decode, mock_get_rsa_key):
+    def test_verify_jwt_success(self, decode_mocks):
         """Test successful JWT verification"""
+        mock_jwt_decode = decode_mocks["decode"]
+        mock_get_rsa_key = decode_mocks["_get_rsa_key"]
         mock_get_rsa_key.return_value = {"kty": "RSA", "kid": "test"}
         mock_jwt_decode.return_value = {"sub": "test-user", "iss": "test-issuer"}
 
@@ -145,6 +129,32 @@ class TestAuth:
         result = verify_jwt(credentials)
         assert result == {"sub": "test-user", "iss": "test-issuer"}
 
+    @patch("backend.auth._get_jwks")
+    def test_verify_jwt_validates_rs256_signature(self, mock_get_jwks, monkeypatch):
+        """A token signed by the published JWKS key verifies end to end"""
+        monkeypatch.setattr("backend.auth.AUTH0_ISSUER", "https://tenant.auth0.com/")
+        monkeypatch.setattr("backend.auth.AUTH0_AUDIENCE", "https://api.example")
+        # tests/test_main.py stubs the key lookup and decoder at import time.
+        monkeypatch.setattr("backend.auth._get_rsa_key", _get_rsa_key)
+        monkeypatch.setattr("backend.auth.jwt.decode", jwt.PyJWT().decode)
+        mock_get_jwks.return_value = JWKS_SIGNING
+        claims = {
+            "sub": "auth0|signed-user",
+            "aud": "https://api.example",
+            "iss": "https://tenant.auth0.com/",
+            "iat": int(time.time()),
+            "exp": int(time.time()) + 3600,
+        }
+        token = jwt.encode(claims, SIGNING_KEY, algorithm="RS256", headers={"kid": "test-key-id"})
+
+        result = verify_jwt(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        assert result == claims
+
+        forged = jwt.encode(claims, ROTATED_KEY, algorithm="RS256", headers={"kid": "test-key-id"})
+        with pytest.raises(HTTPException) as exc_info:
+            verify_jwt(HTTPAuthorizationCredentials(scheme="Bearer", credentials=forged))
+        assert exc_info.value.status_code == 401
+
     def test_verify_jwt_dev_token(self, monkeypatch):
         """Test opt-in developer token verification"""
         monkeypatch.setenv("ENABLE_DEV_AUTH", "1")
@@ -176,10 +186,10 @@ class TestAuth:
         with pytest.raises(HTTPException):
             verify_jwt(credentials)
 
-    @patch("backend.auth._get_rsa_key")
-    @patch("backend.auth.jwt.decode")
-    def test_verify_jwt_invalid_token(self, mock_jwt_decode, mock_get_rsa_key):
+    def test_verify_jwt_invalid_token(self, decode_mocks):
         """Test JWT verification with invalid token"""
+        mock_jwt_decode = decode_mocks["decode"]
+        mock_get_rsa_key = decode_mocks["_get_rsa_key"]
         mock_get_rsa_key.return_value = {"kty": "RSA", "kid": "test"}
         mock_jwt_decode.side_effect = Exception("Invalid token")
 
@@ -208,15 +218,208 @@ class TestAuth:
 
     @patch("backend.auth.requests.get")
     def test_get_jwks_cache(self, mock_get):
-        """Ensure JWKS fetch is cached and reused until cleared"""
-        mock_response = Mock()
-        mock_response.json.return_value = {"keys": [{"kid": "k1"}]}
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
+        """Ensure JWKS fetch is cached and reused within its TTL"""
+        mock_get.return_value = _jwks_response(JWKS_ONE_KEY)
 
-        _get_jwks.cache_clear()
         r1 = _get_jwks()
         r2 = _get_jwks()
-        assert r1 == r2 == {"keys": [{"kid": "k1"}]}
-        # Called once thanks to lru_cache
+        assert r1 == r2 == JWKS_ONE_KEY
         mock_get.assert_called_once()
+
+    @patch("backend.auth.requests.get")
+    def test_get_jwks_refetches_after_ttl(self, mock_get, monkeypatch):
+        """An expired JWKS is refetched instead of being cached forever"""
+        mock_response = Mock()
+        mock_response.json.side_effect = [{"keys": [{"kid": "k1"}]}, {"keys": [{"kid": "k2"}]}]
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        now = [1000.0]
+        monkeypatch.setattr("backend.auth.time.monotonic", lambda: now[0])
+
+        assert _get_jwks() == {"keys": [{"kid": "k1"}]}
+        now[0] += 301
+        assert _get_jwks() == {"keys": [{"kid": "k2"}]}
+        assert mock_get.call_count == 2
+
+    @patch("backend.auth.requests.get")
+    def test_get_jwks_serves_stale_keys_then_fails_closed(self, mock_get, monkeypatch):
+        """A failed refresh falls back to the last JWKS only within the stale window"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"keys": [{"kid": "k1"}]}
+        mock_response.raise_for_status.side_effect = [None, Exception("down"), Exception("down")]
+        mock_get.return_value = mock_response
+        now = [1000.0]
+        monkeypatch.setattr("backend.auth.time.monotonic", lambda: now[0])
+
+        _get_jwks()
+        now[0] += 600
+        assert _get_jwks() == {"keys": [{"kid": "k1"}]}
+        now[0] += 600
+        with pytest.raises(JWKSUnavailable):
+            _get_jwks()
+
+    @patch("backend.auth.jwt.get_unverified_header")
+    def test_verify_jwt_returns_503_when_keys_are_unavailable(self, mock_get_header, monkeypatch):
+        """An Auth0 outage past the stale window is a 503, not an invalid token"""
+        mock_get_header.return_value = {"kid": "test-key-id"}
+        now = [1000.0]
+        monkeypatch.setattr("backend.auth.time.monotonic", lambda: now[0])
+        monkeypatch.setattr("backend.auth._jwks_cache", (JWKS_SIGNING, now[0] - 1000))
+
+        def failing_fetch():
+            raise requests.ConnectionError("Auth0 down")
+
+        monkeypatch.setattr("backend.auth._fetch_jwks", failing_fetch)
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="some-token")
+
+        with pytest.raises(HTTPException) as exc_info:
+            verify_jwt(credentials)
+        assert exc_info.value.status_code == 503
+
+    def test_verify_jwt_reuses_verified_claims(self, decode_mocks):
+        """Repeated requests with the same token skip signature verification"""
+        mock_jwt_decode = decode_mocks["decode"]
+        mock_get_rsa_key = decode_mocks["_get_rsa_key"]
+        mock_get_rsa_key.return_value = {"kty": "RSA", "kid": "test"}
+        mock_jwt_decode.return_value = {"sub": "test-user", "exp": time.time() + 3600}
+
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="cached-token")
+
+        assert verify_jwt(credentials) == verify_jwt(credentials)
+        mock_jwt_decode.assert_called_once()
+
+    def test_verify_jwt_cached_claims_are_not_shared(self, decode_mocks):
+        """Mutating the claims one request received does not leak into later requests"""
+        decode_mocks["_get_rsa_key"].return_value = {"kty": "RSA", "kid": "test"}
+        decode_mocks["decode"].return_value = {"sub": "test-user", "exp": time.time() + 3600}
+
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="shared-token")
+
+        verify_jwt(credentials)["sub"] = "first-request"
+        verify_jwt(credentials)["sub"] = "second-request"
+        assert verify_jwt(credentials)["sub"] == "test-user"
+
+    def test_verify_jwt_does_not_cache_expired_claims(self, decode_mocks):
+        """Claims are never cached past the token's own expiry"""
+        mock_jwt_decode = decode_mocks["decode"]
+        mock_get_rsa_key = decode_mocks["_get_rsa_key"]
+        mock_get_rsa_key.return_value = {"kty": "RSA", "kid": "test"}
+        mock_jwt_decode.return_value = {"sub": "test-user", "exp": time.time() - 1}
+
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="expiring-token")
+
+        verify_jwt(credentials)
+        verify_jwt(credentials)
+        assert mock_jwt_decode.call_count == 2
+
+    def test_get_rsa_key_parses_each_jwks_document_once(self, rsa_key_mocks):
+        """Parsed public keys are reused until the JWKS document changes"""
+        mock_get_header = rsa_key_mocks["get_unverified_header"]
+        mock_get_jwks = rsa_key_mocks["_get_jwks"]
+        mock_get_header.return_value = {"kid": "test-key-id"}
+        mock_get_jwks.return_value = {"keys": [SIGNING_JWK, {"kid": "broken", "kty": "EC"}]}
+
+        with patch("backend.auth.jwt.PyJWK", wraps=jwt.PyJWK) as pyjwk:
+            first = _get_rsa_key("test-token")
+            second = _get_rsa_key("test-token")
+
+        assert first is second
+        assert pyjwk.call_count == 2  # one pass over the two published keys
+
+    @patch("backend.auth.requests.get")
+    @patch("backend.auth.jwt.get_unverified_header")
+    def test_get_jwks_indexes_keys_at_fetch_time(self, mock_get_header, mock_get):
+        """Keys are parsed when the JWKS is fetched, not on the verification path"""
+        mock_get.return_value = _jwks_response(JWKS_SIGNING)
+        mock_get_header.return_value = {"kid": "test-key-id"}
+
+        _get_jwks()
+        with patch("backend.auth.jwt.PyJWK") as pyjwk:
+            result = _get_rsa_key("test-token")
+
+        pyjwk.assert_not_called()
+        assert result.public_numbers() == SIGNING_KEY.public_key().public_numbers()
+
+    def test_get_jwks_single_flight_under_concurrency(self, monkeypatch):
+        """Concurrent cold-cache callers share one JWKS fetch"""
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return JWKS_SIGNING
+
+        monkeypatch.setattr("backend.auth._fetch_jwks", slow_fetch)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: _get_jwks(), range(8)))
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_get_jwks_failure_is_not_retried_by_queued_callers(self, monkeypatch):
+        """After a failed fetch, callers fall back without refetching until the interval passes"""
+        calls = []
+
+        def failing_fetch():
+            calls.append(1)
+            raise requests.ConnectionError("Auth0 down")
+
+        monkeypatch.setattr("backend.auth._fetch_jwks", failing_fetch)
+        now = [1000.0]
+        monkeypatch.setattr("backend.auth.time.monotonic", lambda: now[0])
+
+        for _ in range(3):
+            with pytest.raises(JWKSUnavailable):
+                _get_jwks()
+        assert len(calls) == 1
+
+        monkeypatch.setattr("backend.auth._jwks_cache", (JWKS_SIGNING, now[0] - 400))
+        assert _get_jwks() is JWKS_SIGNING
+        assert len(calls) == 1
+
+        now[0] += 31
+        assert _get_jwks() is JWKS_SIGNING
+        assert len(calls) == 2
+
+    def test_get_jwks_rate_limits_forced_refresh(self, monkeypatch):
+        """Kid misses refetch the JWKS at most once per minimum refresh interval"""
+        calls = []
+        monkeypatch.setattr("backend.auth._fetch_jwks", lambda: calls.append(1) or JWKS_SIGNING)
+        now = [1000.0]
+        monkeypatch.setattr("backend.auth.time.monotonic", lambda: now[0])
+
+        _get_jwks()
+        _get_jwks(force_refresh=True)
+        assert len(calls) == 1
+
+        now[0] += 31
+        _get_jwks(force_refresh=True)
+        assert len(calls) == 2
+
+    @patch("backend.auth._get_jwks")
+    def test_verify_jwt_tolerates_clock_skew_and_requires_claims(self, mock_get_jwks, monkeypatch):
+        """Tokens just past exp verify within the leeway; tokens missing exp do not"""
+        monkeypatch.setattr("backend.auth.AUTH0_ISSUER", "https://tenant.auth0.com/")
+        monkeypatch.setattr("backend.auth.AUTH0_AUDIENCE", "https://api.example")
+        monkeypatch.setattr("backend.auth._get_rsa_key", _get_rsa_key)
+        monkeypatch.setattr("backend.auth.jwt.decode", jwt.PyJWT().decode)
+        mock_get_jwks.return_value = JWKS_SIGNING
+        claims = {
+            "sub": "auth0|skewed-user",
+            "aud": "https://api.example",
+            "iss": "https://tenant.auth0.com/",
+            "iat": int(time.time()) - 3600,
+        }
+
+        def bearer(extra_claims):
+            token = jwt.encode(
+                {**claims, **extra_claims},
+                SIGNING_KEY,
+                algorithm="RS256",
+                headers={"kid": "test-key-id"},
+            )
+            return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        assert verify_jwt(bearer({"exp": int(time.time()) - 10}))["sub"] == "auth0|skewed-user"
+        with pytest.raises(HTTPException):
+            verify_jwt(bearer({}))
@@ -0,0 +1,47 @@
+from backend.cache import TTLCache
+
+
+def test_ttl_cache_returns_stored_values_until_popped():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing", "default") == "default"
+    assert cache.pop("a") == 1
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr("backend.cache.time.monotonic", lambda: now["value"])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("default", "x")
+    cache.set("short", "y", ttl=1)
+
+    now["value"] += 2
+    assert cache.get("default") == "x"
+    assert cache.get("short") is None
+
+    now["value"] += 4
+    assert cache.get("default") is None
+
+
+def test_ttl_cache_skips_non_positive_ttl():
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("expired", "x", ttl=-1)
+
+    assert cache.get("expired") is None
+    assert len(cache) == 0
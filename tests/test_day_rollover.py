@@ -1,75 +1,55 @@
 import pytest
-from fastapi.testclient import TestClient
-from datetime import datetime, timedelta
-import json
+from unittest.mock import Mock
 
-from backend.main import app, get_db, verify_jwt
-
-
-def mock_verify_jwt():
-    return {"sub": "test-user-123", "email": "test@example.com"}
-
-
-def mock_get_db():
-    from unittest.mock import Mock
-
-    db = Mock()
-
-    # Mock user with rollover settings
-    mock_user = Mock()
-    mock_user.id = "test-user-123"
-    mock_user.settings = {"day_rollover_hour": 3, "reward_unit": "$", "total_rewards": 100}
-
-    db.query().filter().first.return_value = mock_user
-    db.add = Mock()
-    db.commit = Mock()
-    db.refresh = Mock()
-
-    return db
-
-
-@pytest.fixture
-def setup_app():
-    app.dependency_overrides[verify_jwt] = mock_verify_jwt
-    app.dependency_overrides[get_db] = mock_get_db
-    yield
-    app.dependency_overrides.clear()
-
-
-@pytest.fixture
-def client(setup_app):
-    return TestClient(app)
+from backend.mcp_server import DEFAULT_ROLLOVER_HOUR, _get_rollover_hour
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestDayRollover:
     """Tests for day rollover functionality"""
 
-    def test_user_settings_with_rollover_hour(self, client):
+    def test_user_settings_with_rollover_hour(self):
         """Test that user settings can include day_rollover_hour"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_get_user_settings_includes_rollover(self, client):
+    def test_get_user_settings_includes_rollover(self):
         """Test getting user settings returns rollover hour"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_default_rollover_hour_handling(self, client):
+    def test_default_rollover_hour_handling(self):
         """Test that default rollover hour is handled correctly"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_check_creation_with_logical_timestamp(self, client):
+    def test_check_creation_with_logical_timestamp(self):
         """Test that check creation uses logical date timestamp"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_check_filtering_with_date_ranges(self, client):
+    def test_check_filtering_with_date_ranges(self):
         """Test filtering checks with logical date ranges"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_rollover_hour_validation(self, client):
-        """Test rollover hour validation (0-23)"""
-        # Stub test - would need proper mocking for full implementation
-        assert True
+
+@pytest.mark.parametrize(
+    "hour, expected",
+    [
+        (0, 0),
+        (3, 3),
+        (6, 6),
+        (12, 12),
+        (23, 23),
+        (25, DEFAULT_ROLLOVER_HOUR),
+        (-1, DEFAULT_ROLLOVER_HOUR),
+        ("not-an-hour", DEFAULT_ROLLOVER_HOUR),
+    ],
+)
+def test_rollover_hour_validation(hour, expected):
+    """Stored rollover hours outside 0-23 fall back to the default"""
+    db = Mock()
+    user = Mock(settings={"day_rollover_hour": hour})
+    db.query.return_value.filter.return_value.first.return_value = user
+    assert _get_rollover_hour(db, "test-user-123") == expected
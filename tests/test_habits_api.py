@@ -1,11 +1,7 @@
 import pytest
-from fastapi.testclient import TestClient
-from datetime import datetime, timedelta, timezone
-import json
-from unittest.mock import Mock, patch, MagicMock
+from pydantic import ValidationError
 
-from backend.main import app, get_db, verify_jwt
-from backend.models import User, Habit, SubHabit, Check, Count, WeightUpdate, ActiveDay
+from backend.main import HabitCreate, app, get_db, verify_jwt
 
 
 # Mock JWT verification
@@ -13,176 +9,148 @@ def mock_verify_jwt():
     return {"sub": "test-user-123", "email": "test@example.com"}
 
 
-# Model-like classes for mocking
-class MockUser:
-    def __init__(self, **kwargs):
-        self.id = kwargs.get("id", "test-user-123")
-        self.email = kwargs.get("email", "test@example.com")
-        self.name = kwargs.get("name", "Test User")
-        self.nickname = kwargs.get("nickname", None)
-        self.image_url = kwargs.get("image_url", None)
-        self.settings = kwargs.get("settings", None)
-        self.created_at = kwargs.get("created_at", datetime.now(timezone.utc))
-        self.updated_at = kwargs.get("updated_at", None)
-
-
-class MockHabit:
-    def __init__(self, **kwargs):
-        self.id = kwargs.get("id", 1)
-        self.user_id = kwargs.get("user_id", "test-user-123")
-        self.name = kwargs.get("name", "Test Habit")
-        self.description = kwargs.get("description", None)
-        self.has_counts = kwargs.get("has_counts", False)
-        self.is_weight = kwargs.get("is_weight", False)
-        self.reward_settings = kwargs.get("reward_settings", None)
-        self.count_settings = kwargs.get("count_settings", None)
-        self.weight_settings = kwargs.get("weight_settings", None)
-        self.schedule_settings = kwargs.get("schedule_settings", None)
-        self.created_at = kwargs.get("created_at", datetime.now(timezone.utc))
-        self.updated_at = kwargs.get("updated_at", None)
-        self.deleted_at = kwargs.get("deleted_at", None)
-
-
-# Mock database session
-def mock_get_db():
-    db = Mock()
-    return db
-
-
 @pytest.fixture
-def client():
-    app.dependency_overrides[verify_jwt] = mock_verify_jwt
-    app.dependency_overrides[get_db] = mock_get_db
-    yield TestClient(app)
-    app.dependency_overrides.clear()
+def habit_api_overrides(monkeypatch):
+    """Authenticate as the test user; the endpoints under test never reach the session"""
+    monkeypatch.setitem(app.dependency_overrides, verify_jwt, mock_verify_jwt)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: None)
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestUserEndpoints:
 
-    def test_get_current_user_existing(self, client):
+    def test_get_current_user_existing(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_get_current_user_auto_create(self, client):
+    def test_get_current_user_auto_create(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_update_current_user(self, client):
+    def test_update_current_user(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestHabitEndpoints:
 
-    def test_get_habits(self, client):
+    def test_get_habits(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_create_habit_simple(self, client):
+    def test_create_habit_simple(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_create_habit_count_based(self, client):
+    def test_create_habit_count_based(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_create_habit_weight_based(self, client):
+    def test_create_habit_weight_based(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_get_habit_by_id(self, client):
+    def test_get_habit_by_id(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_get_habit_not_found(self, client):
+    def test_get_habit_not_found(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_update_habit(self, client):
+    def test_update_habit(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_delete_habit_soft(self, client):
+    def test_delete_habit_soft(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_delete_habit_hard(self, client):
+    def test_delete_habit_hard(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
 
 # I'll add stub tests for the other endpoint classes to satisfy the precommit test requirements
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestSubHabitEndpoints:
-    def test_get_sub_habits(self, client):
+    def test_get_sub_habits(self):
         assert True  # Stub - would need more complex mocking
 
-    def test_create_sub_habit(self, client):
+    def test_create_sub_habit(self):
         assert True  # Stub
 
-    def test_create_sub_habit_parent_not_found(self, client):
+    def test_create_sub_habit_parent_not_found(self):
         assert True  # Stub
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestCheckEndpoints:
-    def test_get_checks(self, client):
+    def test_get_checks(self):
         assert True  # Stub
 
-    def test_create_check_for_habit(self, client):
+    def test_create_check_for_habit(self):
         assert True  # Stub
 
-    def test_create_check_habit_not_found(self, client):
+    def test_create_check_habit_not_found(self):
         assert True  # Stub
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestCountEndpoints:
-    def test_get_counts(self, client):
+    def test_get_counts(self):
         assert True  # Stub
 
-    def test_create_count(self, client):
+    def test_create_count(self):
         assert True  # Stub
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestWeightUpdateEndpoints:
-    def test_get_weight_updates(self, client):
+    def test_get_weight_updates(self):
         assert True  # Stub
 
-    def test_create_weight_update(self, client):
+    def test_create_weight_update(self):
         assert True  # Stub
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestActiveDayEndpoints:
-    def test_get_active_days(self, client):
+    def test_get_active_days(self):
         assert True  # Stub
 
-    def test_create_active_day(self, client):
+    def test_create_active_day(self):
         assert True  # Stub
 
-    def test_update_active_day(self, client):
+    def test_update_active_day(self):
         assert True  # Stub
 
 
 class TestErrorHandling:
-    def test_habit_not_owned_by_user(self, client):
+    @pytest.mark.skip(reason="stub test, not implemented")
+    def test_habit_not_owned_by_user(self):
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_invalid_json_data(self, client):
-        response = client.post("/api/habits", data="invalid json")
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_invalid_json_data(self, aclient, habit_api_overrides):
+        response = await aclient.post("/api/habits", content="invalid json")
         assert response.status_code == 422
 
-    def test_missing_required_fields(self, client):
-        habit_data = {}  # Missing required 'name' field
-
-        response = client.post("/api/habits", json=habit_data)
-        assert response.status_code == 422
+    def test_missing_required_fields(self):
+        # A pure schema check; test_invalid_json_data covers the HTTP 422 mapping
+        with pytest.raises(ValidationError):
+            HabitCreate.model_validate({})  # Missing required 'name' field
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestDataValidation:
-    def test_habit_name_length(self, client):
+    def test_habit_name_length(self):
         assert True  # Stub - would need actual validation
 
-    def test_count_negative_values(self, client):
+    def test_count_negative_values(self):
         assert True  # Stub
 
-    def test_weight_validation(self, client):
+    def test_weight_validation(self):
         assert True  # Stub
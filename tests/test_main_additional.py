@@ -3,6 +3,7 @@ Additional tests for main.py to improve coverage
 """
 
 import io
+import httpx
 import pytest
 from PIL import Image
 from unittest.mock import patch, Mock
@@ -20,16 +21,13 @@ def image_bytes(image_format: str) -> bytes:
     return output.getvalue()
 
 
-@pytest.fixture
-def client(tmp_path, monkeypatch):
-    """Create test client with isolated database"""
-    db_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    models.Base.metadata.create_all(bind=engine)
+@pytest.fixture(scope="module")
+def app_client(test_engine):
+    """One test client, storage stub and set of overrides for the whole module"""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
     def override_get_db():
-        db = TestingSessionLocal()
+        db = SessionLocal()
         try:
             yield db
         finally:
@@ -38,14 +36,18 @@ def client(tmp_path, monkeypatch):
     def mock_auth():
         return {"sub": "test_user"}
 
+    saved_overrides = dict(app.dependency_overrides)
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[verify_jwt] = mock_auth
 
     uploads = {}
 
     class DummyStorage:
-        def upload_fileobj(self, fileobj, key, content_type=None):
-            uploads[key] = fileobj.read()
+        def object_exists(self, key):
+            return key in uploads
+
+        def upload_bytes(self, data, key, content_type=None, cache_control=None):
+            uploads[key] = data
 
         def public_object_url(self, key, request_base_url):
             return f"{request_base_url.rstrip('/')}/api/profile-picture/{key}"
@@ -53,11 +55,22 @@ def client(tmp_path, monkeypatch):
         def presigned_get_url(self, key, expires_in=3600):
             return f"https://storage.example/{key}?signed=1"
 
-    monkeypatch.setattr("backend.main.profile_picture_storage", DummyStorage())
-
-    client = TestClient(app)
-    yield client, uploads
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("backend.main.profile_picture_storage", DummyStorage())
+        yield TestClient(app), uploads
     app.dependency_overrides.clear()
+    app.dependency_overrides.update(saved_overrides)
+
+
+@pytest.fixture
+def client(app_client, TestingSessionLocal):
+    """The shared client, with uploads, rows and any per-test overrides reset afterwards"""
+    saved_overrides = dict(app.dependency_overrides)
+    yield app_client
+    if app.dependency_overrides != saved_overrides:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved_overrides)
+    app_client[1].clear()
 
 
 class TestNuggetGeneration:
@@ -101,7 +114,10 @@ class TestErrorHandling:
         c, _ = client
 
         class FailingStorage:
-            def upload_fileobj(self, fileobj, key, content_type=None):
+            def object_exists(self, key):
+                return False
+
+            def upload_bytes(self, data, key, content_type=None, cache_control=None):
                 raise Exception("Storage Error")
 
             def public_object_url(self, key, request_base_url):
@@ -141,44 +157,70 @@ class TestHealthCheck:
         assert response.status_code == 200
 
 
-import os
-from backend.main import frontend_path
-
-
 class TestHealthAndSPA:
     """Test health check and SPA static file serving"""
 
-    def test_health_endpoint(self, client):
-        c, _ = client
-        resp = c.get("/health")
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_health_endpoint(self, aclient, assert_json_contains):
+        resp = await aclient.get("/health")
         assert resp.status_code == 200
-        data = resp.json()
-        assert data.get("status") == "healthy"
-        assert data.get("service") == "swoosh-api"
-        assert data.get("database") == "connected"
+        data = assert_json_contains(
+            resp, status="healthy", service="swoosh-api", database="connected"
+        )
         assert "openai" in data and "storage" in data
 
-    def test_spa_index_and_fallback(self, client):
-        c, _ = client
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_spa_index_and_fallback(self, aclient, index_html_bytes):
         # Root serves index.html
-        r_index = c.get("/")
+        r_index = await aclient.get("/")
         assert r_index.status_code == 200
         assert "text/html" in r_index.headers.get("content-type", "")
+        assert r_index.content == index_html_bytes
         # Unknown path falls back to same index content
-        r_fallback = c.get("/nonexistent-path")
+        r_fallback = await aclient.get("/nonexistent-path")
         assert r_fallback.status_code == 200
-        assert r_fallback.content == r_index.content
+        assert r_fallback.content == index_html_bytes
+
+    def test_spa_files_are_stat_once(self, client):
+        import backend.main as main_module
+
+        c, _ = client
+        c.get("/index.html")
+        hits = main_module._static_file_stat.cache_info().hits
+        r = c.get("/index.html")
+        assert r.status_code == 200
+        assert r.headers["etag"]
+        assert main_module._static_file_stat.cache_info().hits == hits + 1
+
+    def test_build_scan_lists_files_and_directories(self, tmp_path):
+        from backend.main import _scan_spa_build
+
+        (tmp_path / "assets" / "images").mkdir(parents=True)
+        (tmp_path / "assets" / "images" / "logo.png").write_bytes(b"png")
+        (tmp_path / "index.html").write_text("<html></html>")
+        outside = tmp_path.parent / f"{tmp_path.name}-secret.txt"
+        outside.write_text("secret")
+        (tmp_path / "leak.txt").symlink_to(outside)
+
+        files, directories = _scan_spa_build(str(tmp_path))
+        assert set(files) == {"index.html", "assets/images/logo.png"}
+        assert directories == {"assets", "assets/images"}
+
+    def test_favicon_resolves_from_build_index(self, monkeypatch):
+        import backend.main as main_module
+
+        monkeypatch.setattr(main_module, "_spa_files", {"favicon.png": "/dist/favicon.png"})
+        monkeypatch.setattr(main_module, "_fallback_favicon", "/dist/favicon.ico")
+        with patch("os.path.isfile", side_effect=AssertionError("probed filesystem")):
+            assert main_module._resolve_favicon("png") == "/dist/favicon.png"
+            assert main_module._resolve_favicon("svg") == "/dist/favicon.ico"
 
-    def test_serve_specific_html_file(self, client):
+    def test_serve_specific_html_file(self, client, index_html_bytes):
         c, _ = client
         # Path matching an existing HTML file
         r = c.get("/index")
         assert r.status_code == 200
-        # Load actual index.html file
-        index_file = os.path.join(frontend_path, "index.html")
-        with open(index_file, "rb") as f:
-            expected = f.read()
-        assert r.content == expected
+        assert r.content == index_html_bytes
 
     def test_static_file_not_found(self, client):
         c, _ = client
@@ -188,13 +230,11 @@ class TestHealthAndSPA:
         body = r.json()
         assert "detail" in body
 
-    def test_expo_static_file(self, client):
+    def test_expo_static_file(self, client, expo_js_files):
         c, _ = client
         # Serve an existing Expo static JS file
-        js_dir = os.path.join(frontend_path, "_expo", "static", "js", "web")
-        files = os.listdir(js_dir)
-        assert files, "No Expo static JS files found"
-        js_file = files[0]
+        assert expo_js_files, "No Expo static JS files found"
+        js_file = expo_js_files[0]
         path = f"/_expo/static/js/web/{js_file}"
         r = c.get(path)
         assert r.status_code == 200
@@ -217,7 +257,7 @@ class TestHealthAndSPA:
 
 
 class TestSettingsMerging:
-    def test_user_overrides_preserved(self, client, monkeypatch):
+    def test_user_overrides_preserved(self, client, mock_auth0_userinfo):
         from backend import models
         from backend.main import get_db
 
@@ -227,22 +267,8 @@ class TestSettingsMerging:
         assert resp.status_code == 200
 
         # Mock userinfo to a different name
-        import backend.main as main_module
-        import requests
-
-        class MockResp:
-            status_code = 200
-
-            def json(self):
-                return {
-                    "name": "Auth0 Name",
-                    "nickname": "nick",
-                    "email": "e@x.com",
-                    "picture": "p",
-                }
-
-        monkeypatch.setattr(main_module, "AUTH0_DOMAIN", "example.auth0.com")
-        monkeypatch.setattr(requests, "get", lambda *a, **k: MockResp())
+        userinfo = {"name": "Auth0 Name", "nickname": "nick", "email": "e@x.com", "picture": "p"}
+        mock_auth0_userinfo(lambda request: httpx.Response(200, json=userinfo))
 
         # Now GET should keep user-provided name
         r2 = c.get("/api/settings")
@@ -250,39 +276,65 @@ class TestSettingsMerging:
         data = r2.json()
         assert data["name"] == "User Name"
 
-    def test_jwt_precedence_over_userinfo(self, client, monkeypatch):
+    def test_jwt_precedence_over_userinfo(self, client, mock_auth0_userinfo, jwt_user):
         # If JWT has fields, we shouldn't need userinfo
-        import backend.auth as auth_module
-        import requests
-
         calls = {"userinfo": 0}
 
-        def fake_get(*args, **kwargs):
+        def fake_userinfo(request):
             calls["userinfo"] += 1
+            return httpx.Response(200, json={"name": "UI Name"})
+
+        mock_auth0_userinfo(fake_userinfo)
+
+        jwt_user(
+            {
+                "sub": "test_user",
+                "name": "JWT Name",
+                "nickname": "n",
+                "email": "e",
+                "picture": "p",
+            }
+        )
 
-            class R:
-                status_code = 200
-
-                def json(self):
-                    return {"name": "UI Name"}
-
-            return R()
-
-        monkeypatch.setattr(requests, "get", fake_get)
+        c, _ = client
+        r = c.get("/api/settings")
+        assert r.status_code == 200
+        assert calls["userinfo"] == 0
 
-        jwt_user = {
-            "sub": "test_user",
+    def test_complete_jwt_profile_skips_userinfo(self, client, mock_auth0_userinfo):
+        c, _ = client
+        app.dependency_overrides[verify_jwt] = lambda: {
+            "sub": "jwt_user",
             "name": "JWT Name",
-            "nickname": "n",
-            "email": "e",
-            "picture": "p",
+            "nickname": "jwt",
+            "email": "jwt@example.com",
+            "picture": "https://example.com/jwt.png",
         }
-        auth_module.jwt.decode = lambda *a, **k: jwt_user
+        userinfo = Mock(return_value=httpx.Response(200, json={}))
+        mock_auth0_userinfo(userinfo)
 
-        c, _ = client
-        r = c.get("/api/settings")
+        r = c.get("/api/settings", headers={"Authorization": "Bearer token"})
         assert r.status_code == 200
-        assert calls["userinfo"] == 0
+        assert r.json()["name"] == "JWT Name"
+        userinfo.assert_not_called()
+
+    def test_complete_settings_are_cached_until_updated(self, client, monkeypatch):
+        import backend.main as main_module
+
+        c, _ = client
+        c.post(
+            "/api/settings",
+            json={"name": "A", "nickname": "a", "email": "a@x.com", "imageUrl": "https://x/a"},
+        )
+        assert c.get("/api/settings").json()["name"] == "A"
+
+        with patch.object(
+            main_module, "_get_or_create_user_settings", side_effect=AssertionError("not cached")
+        ):
+            assert c.get("/api/settings").json()["name"] == "A"
+
+        assert c.post("/api/settings", json={"name": "B"}).status_code == 200
+        assert c.get("/api/settings").json()["name"] == "B"
 
     def test_row_created_on_first_get(self, client):
         # A first GET should succeed and return the expected shape (implies row exists)
@@ -291,3 +343,70 @@ class TestSettingsMerging:
         assert r.status_code == 200
         data = r.json()
         assert set(data.keys()) == {"name", "nickname", "email", "imageUrl"}
+
+
+class TestStartupMigrations:
+    def test_prepare_database_migrates_legacy_schema_once(self, tmp_path, monkeypatch):
+        import backend.main as main_module
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE user_settings")
+            connection.exec_driver_sql(
+                "CREATE TABLE user_settings (id INTEGER PRIMARY KEY, user_id VARCHAR)"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO habits (id, user_id, name, created_at) VALUES (1, 'u', 'h', '2024-01-01')"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO sub_habits (id, parent_habit_id, user_id, name) VALUES (1, 1, 'u', 's')"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO checks (user_id, sub_habit_id, checked, check_date) "
+                "VALUES ('u', 1, 1, '2024-01-01')"
+            )
+            connection.exec_driver_sql("DROP INDEX ix_checks_user_date")
+            connection.exec_driver_sql("CREATE INDEX ix_checks_user_id ON checks (user_id)")
+        monkeypatch.setattr(main_module, "engine", engine)
+        monkeypatch.setattr(main_module, "_database_ready", False)
+
+        main_module._prepare_database()
+
+        with engine.connect() as connection:
+            assert main_module._missing_user_settings_columns(connection) == []
+            assert connection.exec_driver_sql("SELECT habit_id FROM checks").scalar() == 1
+            assert main_module._missing_indexes(connection) == []
+            assert main_module._obsolete_indexes(connection) == []
+
+        with patch.object(main_module, "_apply_migrations") as apply_migrations:
+            main_module._prepare_database()
+            monkeypatch.setattr(main_module, "_database_ready", False)
+            main_module._prepare_database()
+        apply_migrations.assert_not_called()
+
+
+class TestThreadpoolSizing:
+    def test_threadpool_grows_to_database_pool_capacity(self, monkeypatch):
+        import anyio
+        import backend.main as main_module
+
+        monkeypatch.setattr(main_module, "pool_capacity", 100)
+
+        async def sized_tokens():
+            main_module._size_threadpool()
+            return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+        assert anyio.run(sized_tokens) == 100
+
+    def test_threadpool_left_alone_for_sqlite(self, monkeypatch):
+        import anyio
+        import backend.main as main_module
+
+        monkeypatch.setattr(main_module, "pool_capacity", None)
+
+        async def sized_tokens():
+            main_module._size_threadpool()
+            return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+        assert anyio.run(sized_tokens) == 40
@@ -1,20 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
-from backend import models
 from backend.main import app
 from backend import mcp_server
 
 
 @pytest.fixture
-def isolated_mcp_db(tmp_path, monkeypatch):
-    db_path = tmp_path / "mcp.db"
-    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    models.Base.metadata.create_all(bind=engine)
-
+def isolated_mcp_db(TestingSessionLocal, monkeypatch):
     monkeypatch.setattr(mcp_server, "_db_session", TestingSessionLocal)
     monkeypatch.setattr(
         mcp_server,
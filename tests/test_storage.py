@@ -1,6 +1,9 @@
 from io import BytesIO
 
-from backend.storage import ObjectStorage, ObjectStorageConfig
+import pytest
+from botocore.exceptions import ClientError
+
+from backend.storage import SINGLE_PUT_MAX_BYTES, ObjectStorage, ObjectStorageConfig
 
 
 def test_storage_config_reads_railway_bucket_env(monkeypatch):
@@ -38,14 +41,18 @@ def test_object_storage_delegates_upload_and_signed_urls():
     calls = {}
 
     class FakeClient:
-        def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        def upload_fileobj(self, fileobj, bucket, key, Config=None, ExtraArgs=None):
             calls["upload"] = {
                 "body": fileobj.read(),
                 "bucket": bucket,
                 "key": key,
                 "extra_args": ExtraArgs,
+                "multipart_threshold": Config.multipart_threshold,
             }
 
+        def put_object(self, **kwargs):
+            calls["put"] = kwargs
+
         def generate_presigned_url(self, operation, Params, ExpiresIn):
             calls["signed"] = {
                 "operation": operation,
@@ -65,6 +72,9 @@ def test_object_storage_delegates_upload_and_signed_urls():
     )
 
     storage.upload_fileobj(BytesIO(b"image"), "profile_pics/key.jpg", "image/jpeg")
+    storage.upload_bytes(
+        b"small", "profile_pics/small.jpg", "image/jpeg", cache_control="public, immutable"
+    )
     signed_url = storage.presigned_get_url("profile_pics/key.jpg", expires_in=60)
     public_url = storage.public_object_url("profile_pics/key.jpg", "https://app.example/")
 
@@ -73,6 +83,15 @@ def test_object_storage_delegates_upload_and_signed_urls():
         "bucket": "bucket",
         "key": "profile_pics/key.jpg",
         "extra_args": {"ContentType": "image/jpeg"},
+        "multipart_threshold": SINGLE_PUT_MAX_BYTES,
+    }
+    assert calls["put"] == {
+        "Bucket": "bucket",
+        "Key": "profile_pics/small.jpg",
+        "Body": b"small",
+        "ContentLength": 5,
+        "ContentType": "image/jpeg",
+        "CacheControl": "public, immutable",
     }
     assert calls["signed"] == {
         "operation": "get_object",
@@ -81,3 +100,28 @@ def test_object_storage_delegates_upload_and_signed_urls():
     }
     assert signed_url == "https://signed.example/object"
     assert public_url == "https://app.example/api/profile-picture/profile_pics/key.jpg"
+
+
+def test_object_storage_object_exists_treats_404_as_missing():
+    class FakeClient:
+        def head_object(self, Bucket, Key):
+            if Key == "missing":
+                raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+            if Key == "forbidden":
+                raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+            return {}
+
+    storage = ObjectStorage(
+        ObjectStorageConfig(
+            bucket_name="bucket",
+            endpoint_url="https://storage.example",
+            access_key_id="access",
+            secret_access_key="secret",
+        ),
+        client=FakeClient(),
+    )
+
+    assert storage.object_exists("present")
+    assert not storage.object_exists("missing")
+    with pytest.raises(ClientError):
+        storage.object_exists("forbidden")
@@ -1,80 +1,37 @@
 import pytest
-from fastapi.testclient import TestClient
-from datetime import datetime
-import json
-
-from backend.main import app, get_db, verify_jwt
-
-
-def mock_verify_jwt():
-    return {"sub": "test-user-123", "email": "test@example.com"}
-
-
-def mock_get_db():
-    from unittest.mock import Mock
-
-    db = Mock()
-
-    # Mock habit data
-    mock_habit = Mock()
-    mock_habit.id = 1
-    mock_habit.user_id = "test-user-123"
-    mock_habit.name = "Test Weight Habit"
-    mock_habit.is_weight = True
-    mock_habit.weight_settings = {"target_weight": 170, "starting_weight": 180, "unit": "lbs"}
-
-    # Mock query chain
-    db.query().filter().first.return_value = mock_habit
-    db.add = Mock()
-    db.commit = Mock()
-    db.refresh = Mock()
-
-    return db
-
-
-@pytest.fixture
-def setup_app():
-    app.dependency_overrides[verify_jwt] = mock_verify_jwt
-    app.dependency_overrides[get_db] = mock_get_db
-    yield
-    app.dependency_overrides.clear()
-
-
-@pytest.fixture
-def client(setup_app):
-    return TestClient(app)
 
 
+@pytest.mark.skip(reason="stub tests, not implemented")
 class TestWeightHabits:
     """Tests for weight habit functionality"""
 
-    def test_create_weight_habit_with_starting_weight(self, client):
+    def test_create_weight_habit_with_starting_weight(self):
         """Test creating a weight habit with starting weight"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_create_weight_habit_without_starting_weight(self, client):
+    def test_create_weight_habit_without_starting_weight(self):
         """Test that backend accepts weight habits without starting weight"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_weight_update_creation(self, client):
+    def test_weight_update_creation(self):
         """Test creating weight updates"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_weight_reward_calculation_improvement(self, client):
+    def test_weight_reward_calculation_improvement(self):
         """Test that moving toward target gives rewards"""
         # This would be tested in integration - the reward calculation
         # happens in the frontend but affects backend reward storage
         assert True
 
-    def test_get_weight_updates(self, client):
+    def test_get_weight_updates(self):
         """Test retrieving weight updates"""
         # Stub test - would need proper mocking for full implementation
         assert True
 
-    def test_dynamic_goal_type_not_stored(self, client):
+    def test_dynamic_goal_type_not_stored(self):
         """Test that goal_type is not stored in backend (removed field)"""
         # Stub test - would need proper mocking for full implementation
         assert True